@@ -5,6 +5,7 @@
 
 import sys
 import os
+import pickle
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -354,5 +355,122 @@ def test_all_cases():
         print("-" * 50)
 
 
+def test_nested_call_arguments():
+    """嵌套调用按语法树逐个检查参数数量和操作符名"""
+    validator = ExpressionValidator("USA", 0, "TOP500")
+    cases = [
+        ("ts_mean(rank(close), 20)", []),
+        ("ts_mean(rank(), 20)", ["rank 参数不足: 至少需要 1 个，实际为 0"]),
+        ("ts_mean(ts_rank(close), 20)", ["ts_rank 参数不足: 至少需要 2 个，实际为 1"]),
+        (
+            "rank(ts_mean(close, 20, 5, 6))",
+            ["ts_mean 参数过多: 最多允许 2 个，实际为 4"],
+        ),
+        ("ts_mean(foo(close), 20)", ["未知操作符: foo"]),
+        ("add(rank(close), bar(volume))", ["未知操作符: bar"]),
+    ]
+    for expr, expected in cases:
+        messages = [e.message for e in validator.collect_errors(expr)]
+        assert messages == expected, (expr, messages)
+
+
+def test_unparsed_nested_call_arguments():
+    """解析失败时的正则回退路径：嵌套调用的参数按配对括号切分"""
+    validator = ExpressionValidator("USA", 0, "TOP500")
+
+    # 外层调用括号未闭合，不应误报参数数量
+    messages = [
+        e.message for e in validator.collect_errors("add(ts_mean(close, 20), volume")
+    ]
+    assert not any("参数不足" in m for m in messages), messages
+
+    # 嵌套调用中的命名参数不应被当作外层调用的参数名
+    messages = [
+        e.message for e in validator.collect_errors("add(unknownf(1, bad=1), foo")
+    ]
+    assert "未知操作符: unknownf" in messages, messages
+    assert not any("unknownf(1, bad" in m for m in messages), messages
+
+
+def test_cached_errors_are_immutable():
+    """字符/语法验证结果会被缓存共享，返回的错误对象不可修改"""
+    import dataclasses
+
+    validator = ExpressionValidator("USA", 0, "TOP500")
+    errors = validator.collect_errors("ts_mean(close, 20")
+    assert errors
+    try:
+        errors[0].message = "changed"
+    except dataclasses.FrozenInstanceError:
+        pass
+    else:
+        raise AssertionError("ValidationError 应为不可变对象")
+    assert validator.collect_errors("ts_mean(close, 20") == errors
+
+
+def test_custom_syntax_validator_is_used():
+    """替换为自定义语法文件的 SyntaxValidator 后，验证流程使用该实例"""
+    from wqb_validator.validator import SyntaxValidator, grammar_path
+
+    validator = ExpressionValidator("USA", 0, "TOP500")
+    assert validator.character_validator is not None
+    custom = SyntaxValidator(grammar_file=grammar_path)
+    calls = []
+    original_validate = custom.validate
+    custom.validate = lambda expr: calls.append(expr) or original_validate(expr)
+    validator.syntax_validator = custom
+
+    assert validator.validate("ts_mean(close, 20)") == (True, [])
+    assert calls == ["ts_mean(close, 20)"]
+    assert not validator.validate("ts_mean(close, 20")[0]
+
+
+def test_invalid_combination_error():
+    """无效组合抛出 InvalidCombinationError，仍可按 ValueError 捕获"""
+    from wqb_validator import InvalidCombinationError
+
+    try:
+        ExpressionValidator("XXX", 1, "TOP1")
+    except ValueError as e:
+        assert isinstance(e, InvalidCombinationError)
+        assert e.combination_key == "XXX_1_TOP1"
+        message = str(e)
+        assert message.startswith("无效参数组合: XXX_1_TOP1\n可用组合:\n")
+        assert "  USA: " in message and "0/TOP500" in message
+        # 可用组合保存为快照，异常可以 pickle 往返
+        assert isinstance(e.available_keys, tuple)
+        restored = pickle.loads(pickle.dumps(e))
+        assert restored.args == e.args and str(restored) == message
+    else:
+        raise AssertionError("无效组合应抛出异常")
+
+
+def test_fast_fail():
+    """fast_fail 在字符或语法错误后跳过后续验证，默认行为不变"""
+    validator = ExpressionValidator("USA", 0, "TOP500")
+
+    broken = "ts_mean(clos, 20"
+    full = [e.message for e in validator.collect_errors(broken)]
+    fast = [e.message for e in validator.collect_errors(broken, fast_fail=True)]
+    assert "无效数据字段: clos" in full
+    assert fast and "无效数据字段: clos" not in fast
+    assert fast == full[: len(fast)]
+
+    # 字符和语法验证通过时，后续验证照常执行
+    ok, errors = validator.validate("ts_mean(clos, 20)", fast_fail=True)
+    assert not ok and any("clos" in error for error in errors)
+
+
+def test_validator_cache_key():
+    """ValidatorKey 与等价的位置参数共用同一个缓存的验证器"""
+    from wqb_validator.validator import ValidatorKey, _cached_validator, _get_validator
+
+    _cached_validator.cache_clear()
+    validator = _get_validator("USA", 0, "TOP500")
+    assert _get_validator(ValidatorKey("USA", 0, "TOP500")) is validator
+    info = _cached_validator.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
 if __name__ == "__main__":
     test_all_cases()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+数据字段 SQLite 缓存测试
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wqb_validator.utils.cache import DataFieldsCache
+
+
+def test_put_get_delete(tmp_path):
+    cache = DataFieldsCache(str(tmp_path / "cache.db"))
+    assert cache.get("USA", 1, "TOP3000") is None
+
+    cache.put("USA", 1, "TOP3000", b'{"count": 0}')
+    cache.put("CHN", 0, "TOP2000U", b'{"count": 1}')
+    # delay 以文本保存，整数与字符串指向同一条缓存
+    assert cache.get("USA", "1", "TOP3000") == b'{"count": 0}'
+    assert cache.count() == 2
+    assert dict(cache.items()) == {
+        ("USA", "1", "TOP3000"): b'{"count": 0}',
+        ("CHN", "0", "TOP2000U"): b'{"count": 1}',
+    }
+
+    cache.put("USA", 1, "TOP3000", b'{"count": 2}')
+    assert cache.get("USA", 1, "TOP3000") == b'{"count": 2}'
+    assert cache.count() == 2
+
+    cache.delete("USA", 1, "TOP3000")
+    assert cache.get("USA", 1, "TOP3000") is None
+    assert cache.count() == 1
+
+
+def test_shared_database_file(tmp_path):
+    """所有组合共用一个数据库文件，重新打开后数据仍在"""
+    db_path = str(tmp_path / "cache.db")
+    DataFieldsCache(db_path).put("USA", 0, "TOP500", b"[]")
+    assert DataFieldsCache(db_path).get("USA", 0, "TOP500") == b"[]"
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+数据字段获取与缓存测试（使用模拟的会话，不访问网络）
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wqb_validator.utils.fetch_data as fetch_data
+
+SETTINGS = {
+    "region": {"choices": {"instrumentType": {"EQUITY": [{"value": "USA"}]}}},
+    "delay": {
+        "choices": {
+            "instrumentType": {
+                "EQUITY": {"region": {"USA": [{"value": 0}, {"value": 1}]}}
+            }
+        }
+    },
+    "universe": {
+        "choices": {
+            "instrumentType": {"EQUITY": {"region": {"USA": [{"value": "TOP500"}]}}}
+        }
+    },
+}
+
+REGION_ROWS = [
+    {"id": "close", "delay": 0, "universe": "TOP500"},
+    {"id": "open", "delay": 1, "universe": "TOP500"},
+]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self.headers = {"ETag": etag} if etag else {}
+        self.content = json.dumps(body or {}).encode("utf-8")
+
+
+class FakeSession:
+    """地区列表返回 REGION_ROWS，单个组合返回 per_combo 字段"""
+
+    def __init__(self, region_count=len(REGION_ROWS)):
+        self.region_count = region_count
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=30):
+        self.requests.append((url.split("?", 1)[1], headers))
+        if_none_match = (headers or {}).get("If-None-Match")
+        if "delay=" not in url:
+            if if_none_match == '"L1"':
+                return FakeResponse(304)
+            body = {"count": self.region_count, "results": REGION_ROWS}
+            return FakeResponse(200, body, '"L1"')
+        if if_none_match == '"C1"':
+            return FakeResponse(304)
+        body = {"count": 1, "results": [{"id": "per_combo"}]}
+        return FakeResponse(200, body, '"C1"')
+
+
+@pytest.fixture
+def fake_env(tmp_path, monkeypatch):
+    """临时缓存数据库及模拟的会话"""
+    session = FakeSession()
+    monkeypatch.setattr(fetch_data, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(fetch_data, "_cache", None)
+    monkeypatch.setattr(fetch_data, "_region_listing_truncated", False)
+    monkeypatch.setattr(fetch_data, "get_settings", lambda: SETTINGS)
+    monkeypatch.setattr(fetch_data, "login", lambda: session)
+    return session
+
+
+def _cached_ids(delay):
+    data, _ = fetch_data._read_cached_data_fields("USA", delay, "TOP500")
+    return [item["id"] for item in data["results"]]
+
+
+def test_truncated_region_listing_falls_back(fake_env):
+    """地区列表 count 与条数不一致时不使用，逐个组合请求"""
+    fake_env.region_count = 40
+    assert fetch_data.get_all_data_fields() == (2, 0)
+    assert _cached_ids(0) == ["per_combo"]
+    assert _cached_ids(1) == ["per_combo"]
+
+
+def test_truncated_listing_skips_other_regions(fake_env, monkeypatch):
+    """首个地区列表被分页截断后，其余地区不再请求地区列表"""
+    settings = json.loads(json.dumps(SETTINGS))
+    settings["region"]["choices"]["instrumentType"]["EQUITY"].append({"value": "CHN"})
+    for name in ("delay", "universe"):
+        choices = settings[name]["choices"]["instrumentType"]["EQUITY"]["region"]
+        choices["CHN"] = choices["USA"]
+    monkeypatch.setattr(fetch_data, "get_settings", lambda: settings)
+    fake_env.region_count = 40
+
+    assert fetch_data.get_all_data_fields() == (4, 0)
+    listings = [query for query, _ in fake_env.requests if "delay=" not in query]
+    assert listings == ["region=USA&instrumentType=EQUITY"]
+    assert len(fake_env.requests) == 5
+
+    # 同一进程内之后的获取直接逐个组合请求
+    fake_env.requests.clear()
+    fetch_data._get_cache().delete("CHN", 0, "TOP500")
+    assert fetch_data.get_all_data_fields() == (4, 0)
+    assert [query for query, _ in fake_env.requests] == [
+        "region=CHN&delay=0&universe=TOP500&instrumentType=EQUITY"
+    ]
+
+
+def test_login_failure_does_not_fan_out(fake_env, monkeypatch):
+    """登录失败时只尝试一次登录，未命中缓存的组合全部计为失败"""
+    calls = []
+    monkeypatch.setattr(fetch_data, "login", lambda: calls.append(1))
+    assert fetch_data.get_all_data_fields() == (0, 2)
+    assert calls == [1]
+    assert fake_env.requests == []
+
+
+def test_region_listing_revalidates_with_etag(fake_env):
+    """完整的地区列表按组合拆分写入，重新校验时发送地区列表的条件请求"""
+    assert fetch_data.get_all_data_fields() == (2, 0)
+    assert _cached_ids(0) == ["close"]
+    assert _cached_ids(1) == ["open"]
+
+    fake_env.requests.clear()
+    assert fetch_data.get_all_data_fields(revalidate=True) == (2, 0)
+    assert fake_env.requests == [
+        ("region=USA&instrumentType=EQUITY", {"If-None-Match": '"L1"'})
+    ]
+
+
+def test_corrupt_cache_entry_is_dropped(fake_env):
+    """损坏的缓存按未命中处理并被删除"""
+    fetch_data._get_cache().put("USA", 0, "TOP500", b"not json")
+    assert fetch_data._read_cached_data_fields("USA", 0, "TOP500") is None
+    assert fetch_data._get_cache().get("USA", 0, "TOP500") is None
+
+
+def test_get_data_fields_revalidates_with_etag(fake_env):
+    """单个组合的缓存保存 ETag，重新校验时发送条件请求，304 时使用缓存"""
+    data = fetch_data.get_data_fields("USA", 0, "TOP500", session=fake_env)
+    assert data["results"] == [{"id": "per_combo"}]
+    assert fetch_data._read_cached_data_fields("USA", 0, "TOP500")[1] == '"C1"'
+
+    # 未要求重新校验时直接使用缓存
+    fake_env.requests.clear()
+    assert fetch_data.get_data_fields("USA", 0, "TOP500", session=fake_env) == data
+    assert fake_env.requests == []
+
+    cached = fetch_data.get_data_fields(
+        "USA", 0, "TOP500", session=fake_env, revalidate=True
+    )
+    assert cached == data
+    assert fake_env.requests == [
+        (
+            "region=USA&delay=0&universe=TOP500&instrumentType=EQUITY",
+            {"If-None-Match": '"C1"'},
+        )
+    ]
+
+
+def test_old_cache_schema_gains_etag_column(tmp_path):
+    """没有 etag 列的旧数据库打开时自动补充该列"""
+    import sqlite3
+
+    from wqb_validator.utils.cache import DataFieldsCache
+
+    db_path = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE data_fields (region TEXT, delay TEXT, universe TEXT, "
+        "payload BLOB, PRIMARY KEY (region, delay, universe))"
+    )
+    conn.execute("INSERT INTO data_fields VALUES ('USA', '1', 'TOP3000', X'7B7D')")
+    conn.commit()
+    conn.close()
+
+    cache = DataFieldsCache(db_path)
+    assert cache.get_entry("USA", 1, "TOP3000") == (b"{}", None)
+    cache.put("USA", 1, "TOP3000", b"{}", '"v2"')
+    assert cache.get_entry("USA", 1, "TOP3000") == (b"{}", '"v2"')
@@ -9,10 +9,9 @@ __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
 # 主要导入
-from .validator import ExpressionValidator
-from .exceptions import ValidationError, ValidationResult
+from .validator import ExpressionValidator, ValidatorKey
+from .exceptions import ValidationError, ValidationResult, InvalidCombinationError
 from .config import config, BASE_URL, DATA_DIR
-from .data_manager import DataManager
 
 # 版本信息
 __all__ = [
@@ -20,8 +19,10 @@ __all__ = [
     "__author__",
     "__email__",
     "ExpressionValidator",
+    "ValidatorKey",
     "ValidationError",
     "ValidationResult",
+    "InvalidCombinationError",
     "config",
     "BASE_URL",
     "DATA_DIR",
@@ -29,6 +30,15 @@ __all__ = [
 ]
 
 
+def __getattr__(name):
+    """延迟导入 DataManager，避免验证命令加载网络和数据处理依赖"""
+    if name == "DataManager":
+        from .data_manager import DataManager
+
+        return DataManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # 包级别信息
 def get_version():
     """获取包版本"""
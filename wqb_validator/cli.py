@@ -85,16 +85,22 @@ def validate_expression(
     """验证表达式"""
     try:
         validator = ExpressionValidator(region, delay, universe)
-        is_valid, errors = validator.validate(expression)
-
-        # 转换为ValidationResult
-        validation_errors = []
-        for error_msg in errors:
-            # 简单的错误解析（可以后续优化）
-            validation_errors.append(ValidationError(message=error_msg))
+        errors = validator.collect_errors(expression)
+
+        # 转换为ValidationResult，消息在输出时才格式化
+        validation_errors = [
+            ValidationError(
+                message=error.message,
+                line=error.line,
+                column=error.column,
+                code=error.code,
+                suggestion=error.suggestion,
+            )
+            for error in errors
+        ]
 
         result = ValidationResult(
-            is_valid=is_valid,
+            is_valid=not validation_errors,
             errors=validation_errors,
             metadata={
                 "region": region,
@@ -10,8 +10,16 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
-from .utils.fetch_data import login, get_operators, get_data_fields, get_all_data_fields
+from .utils.fetch_data import (
+    login,
+    get_operators,
+    get_all_data_fields,
+    get_username,
+    get_password,
+    CACHE_DB_PATH,
+)
 from .utils.logger import print_log
+from .utils.cache import DataFieldsCache
 
 
 class DataManager:
@@ -85,9 +93,11 @@ WQ_BASE_URL={base_url or self.config['base_url']}
             # 设置环境变量供fetch_data使用
             os.environ["WQ_USERNAME"] = self.config["email"]
             os.environ["WQ_PASSWORD"] = self.config["password"]
+            get_username.cache_clear()
+            get_password.cache_clear()
 
-            # 尝试登录
-            session = login()
+            # 向服务器重新认证，不复用已保存的会话，确保凭据本身有效
+            session = login(force=True)
             if session:
                 print("✅ 认证成功！")
                 return True
@@ -117,13 +127,13 @@ WQ_BASE_URL={base_url or self.config['base_url']}
 
             print("📥 正在获取数据字段信息...")
             # 获取所有数据字段
-            success_count, failed_count = get_all_data_fields()
+            success_count, failed_count = get_all_data_fields(revalidate=force_update)
 
             if success_count > 0:
                 # 处理数据字段文件
                 from .utils.handle_data import handle_data_fields
 
-                handle_data_fields(str(self.data_dir))
+                handle_data_fields()
                 print(f"✅ 数据字段信息已处理: {self.data_dir}/data_fields.json")
             else:
                 print("⚠️  数据字段信息获取失败")
@@ -186,12 +196,16 @@ WQ_BASE_URL={base_url or self.config['base_url']}
         else:
             print("  📊 数据字段信息: ❌")
 
-        # 统计地区数据文件
-        region_files = list(self.data_dir.glob("data_fields_*.json"))
-        if region_files:
-            print(f"  🌍 地区数据文件: ✅ ({len(region_files)} 个)")
+        # 统计地区数据缓存
+        cached_count = (
+            DataFieldsCache(CACHE_DB_PATH).count()
+            if os.path.exists(CACHE_DB_PATH)
+            else 0
+        )
+        if cached_count:
+            print(f"  🌍 地区数据缓存: ✅ ({cached_count} 个组合)")
         else:
-            print("  🌍 地区数据文件: ❌")
+            print("  🌍 地区数据缓存: ❌")
 
         print("\n💡 提示: 使用 'wqb-data update' 手动更新数据")
 
@@ -2,11 +2,15 @@
 WQB Expression Validator 异常定义
 """
 
+import sys
 from dataclasses import dataclass
 from typing import List, Optional
 
+# Python 3.10 起 dataclass 支持 slots，错误对象数量多时可省去实例 __dict__
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class ValidationError:
     """验证错误信息"""
 
@@ -18,9 +22,12 @@ class ValidationError:
 
     def __str__(self):
         """字符串表示"""
+        text = self.message
         if self.line and self.column:
-            return f"第{self.line}行第{self.column}列: {self.message}"
-        return self.message
+            text = f"第{self.line}行第{self.column}列: {self.message}"
+        if self.suggestion:
+            text += f" ({self.suggestion})"
+        return text
 
     def to_dict(self):
         """转换为字典格式"""
@@ -112,3 +119,33 @@ class GrammarError(ValidationException):
     """语法错误"""
 
     pass
+
+
+class InvalidCombinationError(ValueError):
+    """无效的参数组合，可用组合列表在转换为字符串时才生成"""
+
+    def __init__(self, combination_key: str, available_keys):
+        available_keys = tuple(available_keys)
+        # args 与构造参数一致，保证异常可以被 pickle 和复制
+        super().__init__(combination_key, available_keys)
+        self.combination_key = combination_key
+        self.available_keys = available_keys
+
+    def __str__(self):
+        # 构建简洁的错误信息
+        lines = [f"无效参数组合: {self.combination_key}", "可用组合:"]
+
+        # 按地区分组显示，更简洁
+        regions = {}
+        for key in sorted(self.available_keys):
+            parts = key.split("_")
+            if len(parts) >= 3:
+                r, d, u = parts[0], parts[1], "_".join(parts[2:])
+                if r not in regions:
+                    regions[r] = []
+                regions[r].append(f"{d}/{u}")
+
+        for region_name, configs in regions.items():
+            lines.append(f"  {region_name}: {', '.join(configs)}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+
+try:
+    import zstandard
+except ImportError:  # 未安装 zstandard 时不压缩
+    zstandard = None
+
+# 数据字段缓存数据库文件名
+CACHE_DB_NAME = "cache.db"
+
+# zstd 帧的魔数，用于识别压缩过的缓存内容
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_ZSTD_LEVEL = 3
+
+
+def _compress(payload):
+    """安装了 zstandard 时压缩缓存内容"""
+    if zstandard is None:
+        return payload
+    return zstandard.compress(payload, _ZSTD_LEVEL)
+
+
+def _decompress(payload):
+    """
+    按魔数识别并解压缓存内容，未压缩的内容原样返回
+
+    无法解压（损坏或未安装 zstandard）时返回空字节串，由调用方按损坏的缓存处理
+    """
+    payload = bytes(payload)
+    if not payload.startswith(_ZSTD_MAGIC):
+        return payload
+    if zstandard is None:
+        return b""
+    try:
+        return zstandard.decompress(payload)
+    except zstandard.ZstdError:
+        return b""
+
+
+class DataFieldsCache:
+    """
+    基于 SQLite 的数据字段缓存
+
+    以 (region, delay, universe) 为主键保存接口返回的 JSON 字节串及其 ETag，
+    所有组合共用一个数据库文件。每个线程使用独立的连接。
+    安装了 zstandard 时 JSON 以 zstd 压缩后保存，读取时自动解压。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS data_fields ("
+            "region TEXT, delay TEXT, universe TEXT, payload BLOB, etag TEXT, "
+            "PRIMARY KEY (region, delay, universe))"
+        )
+        # 兼容没有 etag 列的旧数据库
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(data_fields)")}
+        if "etag" not in columns:
+            conn.execute("ALTER TABLE data_fields ADD COLUMN etag TEXT")
+        conn.commit()
+
+    def _connect(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, region, delay, universe):
+        """读取缓存的 JSON 字节串，未命中时返回 None"""
+        entry = self.get_entry(region, delay, universe)
+        return entry[0] if entry else None
+
+    def get_entry(self, region, delay, universe):
+        """读取缓存的 (JSON 字节串, ETag)，未命中时返回 None"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT payload, etag FROM data_fields "
+                "WHERE region = ? AND delay = ? AND universe = ?",
+                (region, str(delay), universe),
+            )
+            .fetchone()
+        )
+        return (_decompress(row[0]), row[1]) if row else None
+
+    def put(self, region, delay, universe, payload, etag=None):
+        """写入 JSON 字节串及其 ETag"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO data_fields "
+                "(region, delay, universe, payload, etag) VALUES (?, ?, ?, ?, ?)",
+                (region, str(delay), universe, _compress(payload), etag),
+            )
+
+    def delete(self, region, delay, universe):
+        """删除一条缓存"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM data_fields "
+                "WHERE region = ? AND delay = ? AND universe = ?",
+                (region, str(delay), universe),
+            )
+
+    def items(self):
+        """遍历所有缓存，返回 ((region, delay, universe), payload)"""
+        cursor = self._connect().execute(
+            "SELECT region, delay, universe, payload FROM data_fields"
+        )
+        for region, delay, universe, payload in cursor:
+            yield (region, delay, universe), _decompress(payload)
+
+    def count(self):
+        """缓存的组合数量"""
+        return self._connect().execute("SELECT COUNT(*) FROM data_fields").fetchone()[0]
@@ -1,12 +1,51 @@
+import functools
+import hashlib
+import itertools
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from http.cookiejar import LoadError, MozillaCookieJar
 from dotenv import load_dotenv
 import os
 import json
 import pandas as pd
 from tqdm import tqdm
 from .logger import print_log
+from .cache import DataFieldsCache, CACHE_DB_NAME
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:  # httpx 为可选依赖，未安装时使用 requests
+    httpx = None
+
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow 为可选依赖，未安装时使用 pandas
+    pa_csv = None
+
+
+def _json_loads(data):
+    """解析 JSON 字节串，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj):
+    """序列化为 JSON 字节串，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
 
 
 # 延迟加载环境变量，在需要时再加载
@@ -35,11 +74,13 @@ def _get_env_var(name, default=None):
     return value
 
 
-# 延迟获取环境变量
+# 延迟获取环境变量，结果在进程内缓存；环境变量变化后需调用 cache_clear()
+@functools.lru_cache(maxsize=1)
 def get_username():
     return _get_env_var("WQ_USERNAME")
 
 
+@functools.lru_cache(maxsize=1)
 def get_password():
     return _get_env_var("WQ_PASSWORD")
 
@@ -49,43 +90,200 @@ from ..config import BASE_URL, DATA_DIR
 
 # 配置已经通过导入获取
 
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# 本地缓存文件路径
+OPERATORS_CSV = os.path.join(DATA_DIR, "operators.csv")
+SETTINGS_JSON = os.path.join(DATA_DIR, "settings.json")
+DATA_FIELDS_JSON = os.path.join(DATA_DIR, "data_fields.json")
+CACHE_DB_PATH = os.path.join(DATA_DIR, CACHE_DB_NAME)
 
 s = None
 
+# 请求失败时可能抛出的异常类型
+_REQUEST_ERRORS = (requests.exceptions.RequestException,)
+if httpx is not None:
+    _REQUEST_ERRORS += (httpx.HTTPError,)
+
+
+# 登录会话 cookie 的持久化目录及有效期（秒）
+COOKIE_DIR = os.path.expanduser("~/.wqb_validator")
+COOKIE_TTL = 3 * 60 * 60
+
+
+def _cookie_file(username):
+    """按用户名区分的 cookie 文件，切换账号时不会复用其他账号的会话"""
+    digest = hashlib.sha256(username.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(COOKIE_DIR, f"cookies-{digest}.txt")
+
+
+def _load_cookie_jar(username):
+    """加载该用户已保存的 cookie，文件不存在或损坏时返回空的 cookie jar"""
+    jar = MozillaCookieJar(_cookie_file(username))
+    try:
+        jar.load(ignore_discard=True)
+    except (OSError, LoadError):
+        jar.clear()
+    return jar
+
+
+def _has_valid_session(jar):
+    """保存的 cookie 是否仍在有效期内"""
+    try:
+        age = time.time() - os.stat(jar.filename).st_mtime
+    except OSError:
+        return False
+    return age < COOKIE_TTL and any(not cookie.is_expired() for cookie in jar)
+
+
+def _save_cookie_jar(jar):
+    """保存 cookie 供后续进程复用"""
+    try:
+        os.makedirs(os.path.dirname(jar.filename), exist_ok=True)
+        jar.save(ignore_discard=True)
+        os.chmod(jar.filename, 0o600)
+    except OSError as e:
+        print_log(f"保存登录会话失败: {e}", "WARNING")
+
+
+def _create_session(username, password, cookies=None):
+    """
+    创建带认证的 HTTP 会话
 
-def make_request_with_retry(session, url, max_retries=3, base_delay=1, max_delay=10):
+    安装了 httpx[http2] 时使用 HTTP/2，在同一连接上多路复用并发请求；
+    否则使用扩大了连接池的 requests 会话
+    """
+    if httpx is not None:
+        return httpx.Client(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            auth=(username, password),
+            cookies=cookies,
+        )
+
+    session = requests.Session()
+    session.auth = (username, password)
+    if cookies is not None:
+        session.cookies = cookies
+    # 扩大连接池，使并发的数据字段请求复用已建立的连接
+    adapter = HTTPAdapter(pool_connections=50, pool_maxsize=100, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class TokenBucket:
+    """
+    自适应令牌桶限流器（线程安全）
+
+    被限流时降低补充速率并遵守 Retry-After，请求成功后逐步恢复速率
+    """
+
+    def __init__(self, rate, capacity, min_rate=0.1, max_rate=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """阻塞直到获得一个令牌"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        """被限流：速率减半，并在 Retry-After 期间暂停发放令牌"""
+        with self._lock:
+            self.rate = max(self.rate * 0.5, self.min_rate)
+            if retry_after:
+                now = time.monotonic()
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+                self._tokens = 0
+
+    def reward(self):
+        """请求成功：逐步恢复速率"""
+        with self._lock:
+            self.rate = min(self.rate * 1.1, self.max_rate)
+
+
+# 所有数据请求共用的限流器
+_rate_limiter = TokenBucket(rate=2.0, capacity=5, max_rate=10.0)
+
+
+def _parse_retry_after(value):
+    """解析 Retry-After 头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+def make_request_with_retry(
+    session, url, max_retries=3, base_delay=1, max_delay=10, headers=None
+):
     """
     带重试机制的请求函数
 
     Args:
-        session: requests会话
+        session: HTTP会话（requests 或 httpx）
         url: 请求URL
         max_retries: 最大重试次数
         base_delay: 基础延迟时间（秒）
         max_delay: 最大延迟时间（秒）
+        headers: 额外的请求头
 
     Returns:
         response: 请求响应
     """
+    throttled = False
     for attempt in range(max_retries + 1):
         try:
-            # 添加随机延迟，避免同时请求
-            if attempt > 0:
+            # 添加随机延迟，避免同时请求；限流后的等待由令牌桶负责
+            if attempt > 0 and not throttled:
                 delay = min(base_delay * (2**attempt) + random.uniform(0, 1), max_delay)
                 print_log(f"第 {attempt} 次重试，等待 {delay:.2f} 秒...", "WARNING")
                 time.sleep(delay)
 
-            response = session.get(url, timeout=30)
+            _rate_limiter.acquire()
+            sent_at = time.monotonic()
+            response = session.get(url, headers=headers, timeout=30)
+
+            # 复用的会话已失效时重新认证，并重发一次请求
+            if response.status_code == 401 and _reauthenticate(session, sent_at):
+                _rate_limiter.acquire()
+                response = session.get(url, headers=headers, timeout=30)
 
             # 检查是否被限流
-            if response.status_code == 429:  # Too Many Requests
-                retry_after = int(
-                    response.headers.get("Retry-After", base_delay * (2**attempt))
-                )
-                print_log(f"请求被限流，等待 {retry_after} 秒后重试...", "WARNING")
-                time.sleep(retry_after)
+            throttled = response.status_code == 429  # Too Many Requests
+            if throttled:
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is None:
+                    retry_after = base_delay * (2**attempt)
+                print_log(f"请求被限流，等待 {retry_after:.0f} 秒后重试...", "WARNING")
+                _rate_limiter.penalize(retry_after)
                 continue
 
             # 检查其他错误状态码
@@ -102,9 +300,10 @@ def make_request_with_retry(session, url, max_retries=3, base_delay=1, max_delay
                     )
                     return response
 
+            _rate_limiter.reward()
             return response
 
-        except requests.exceptions.RequestException as e:
+        except _REQUEST_ERRORS as e:
             if attempt < max_retries:
                 print_log(f"请求异常: {e}，准备重试...", "WARNING")
                 continue
@@ -148,43 +347,118 @@ def _show_environment_help():
     print_log("=" * 60, "WARNING")
 
 
-def login():
-    global s
-    if s is not None:
-        return s
-
-    username = get_username()
-    password = get_password()
+_login_lock = threading.Lock()
+# 当前会话的 cookie jar 及最近一次认证成功的时间（time.monotonic）
+_session_jar = None
+_last_login = 0.0
 
-    if not username or not password:
-        _show_environment_help()
-        return None
 
-    print_log("开始登录认证...")
-    s = requests.Session()
-    s.auth = (username, password)
+def _reauthenticate(session, failed_at):
+    """
+    请求返回 401 时重新认证当前会话，成功返回 True
 
-    start_time = time.time()
-    response = s.post(f"{BASE_URL}/authentication")
-    login_time = time.time() - start_time
+    多个请求同时失效时只认证一次：请求发出之后已有其他线程完成认证的，直接重试
+    """
+    global _last_login
+    with _login_lock:
+        if _last_login > failed_at:
+            return True
+        print_log("登录会话已失效，重新认证...", "WARNING")
+        response = session.post(f"{BASE_URL}/authentication")
+        if response.status_code != 201:
+            print_log(f"重新认证失败，状态码: {response.status_code}", "ERROR")
+            return False
+        _last_login = time.monotonic()
+        if _session_jar is not None:
+            _save_cookie_jar(_session_jar)
+        return True
+
+
+def login(force=False):
+    """
+    登录并返回会话
 
-    if response.status_code == 201:
-        print_log(f"登录成功，耗时: {login_time:.2f}秒")
+    :param force: 为 True 时忽略已有会话和保存的 cookie，重新向服务器认证，
+        用于校验新设置的凭据
+    """
+    global s, _session_jar, _last_login
+    if s is not None and not force:
         return s
-    else:
-        print_log(f"登录失败，状态码: {response.status_code}", "ERROR")
-        if response.status_code == 401:
+
+    # 多个线程同时登录时只发起一次认证请求
+    with _login_lock:
+        if s is not None and not force:
+            return s
+
+        username = get_username()
+        password = get_password()
+
+        if not username or not password:
             _show_environment_help()
-        s = None
-        return None
+            return None
+
+        jar = _load_cookie_jar(username)
+        session = _create_session(username, password, cookies=jar)
+
+        # 复用有效期内的登录会话，跳过认证请求
+        if not force and _has_valid_session(jar):
+            print_log("复用已保存的登录会话")
+            _session_jar = jar
+            s = session
+            return s
+
+        if force:
+            # 认证失败时不应继续使用旧账号的会话
+            s = None
+            jar.clear()
+
+        print_log("开始登录认证...")
+        start_time = time.time()
+        response = session.post(f"{BASE_URL}/authentication")
+        login_time = time.time() - start_time
+
+        if response.status_code == 201:
+            print_log(f"登录成功，耗时: {login_time:.2f}秒")
+            _save_cookie_jar(jar)
+            _last_login = time.monotonic()
+            _session_jar = jar
+            # 认证成功后才发布会话，其他线程不会拿到未认证的会话
+            s = session
+            return s
+        else:
+            print_log(f"登录失败，状态码: {response.status_code}", "ERROR")
+            if response.status_code == 401:
+                _show_environment_help()
+            return None
+
+
+def _is_cached(path):
+    """缓存文件是否存在且非空，只做一次 stat"""
+    try:
+        return os.stat(path).st_size > 0
+    except OSError:
+        return False
+
+
+def _read_operators_csv(path):
+    """读取操作符 CSV，优先使用 pyarrow 的多线程解析器"""
+    if pa_csv is None:
+        return pd.read_csv(path)
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        # 与 pandas 一致，空字符串按缺失值处理
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+    )
+    return table.to_pandas(self_destruct=True)
 
 
 def get_operators():
     print_log("开始获取操作符数据...")
 
-    if os.path.exists(f"{DATA_DIR}/operators.csv"):
+    if _is_cached(OPERATORS_CSV):
         print_log("从本地缓存读取操作符数据")
-        operators_df = pd.read_csv(f"{DATA_DIR}/operators.csv")
+        operators_df = _read_operators_csv(OPERATORS_CSV)
         print_log(f"成功读取 {len(operators_df)} 个操作符")
     else:
         print_log("从API获取操作符数据...")
@@ -199,9 +473,9 @@ def get_operators():
         api_time = time.time() - start_time
 
         if response.status_code == 200:
-            operators = response.json()
+            operators = _json_loads(response.content)
             operators_df = pd.DataFrame(operators)
-            operators_df.to_csv(f"{DATA_DIR}/operators.csv", index=False)
+            operators_df.to_csv(OPERATORS_CSV, index=False)
             print_log(
                 f"成功获取并保存 {len(operators_df)} 个操作符，API耗时: {api_time:.2f}秒"
             )
@@ -212,7 +486,9 @@ def get_operators():
     return operators_df
 
 
-def get_data_fields(region, delay, universe, request_delay=0.5):
+def get_data_fields(
+    region, delay, universe, request_delay=0, session=None, revalidate=False
+):
     """
     获取数据字段
 
@@ -220,22 +496,17 @@ def get_data_fields(region, delay, universe, request_delay=0.5):
         region: 地区
         delay: 延迟
         universe: 宇宙
-        request_delay: 请求间隔时间（秒）
+        request_delay: 额外的请求间隔时间（秒），默认由令牌桶限速
+        session: 已登录的会话，为空时调用 login()
+        revalidate: 已有缓存时是否向服务器确认数据是否变化
     """
-    file_path = f"{DATA_DIR}/data_fields_{region}_{delay}_{universe}.json"
-
     # 检查本地缓存
-    if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-        try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
-                return data
-        except json.JSONDecodeError:
-            print_log(f"缓存文件损坏，将重新获取: {file_path}", "WARNING")
-            os.remove(file_path)
+    cached = _read_cached_data_fields(region, delay, universe)
+    if cached is not None and not revalidate:
+        return cached[0]
 
     # 从API获取数据
-    s = login()
+    s = session or login()
 
     if s is None:
         print_log(f"登录失败，无法获取数据字段 - {region}_{delay}_{universe}", "ERROR")
@@ -247,49 +518,271 @@ def get_data_fields(region, delay, universe, request_delay=0.5):
     if request_delay > 0:
         time.sleep(request_delay)
 
+    # 携带缓存的 ETag 发起条件请求，数据未变化时服务器返回 304；
+    # 由地区列表写入的缓存没有该组合自己的 ETag，直接重新获取
+    headers = None
+    if (
+        cached is not None
+        and cached[1]
+        and not cached[1].startswith(_REGION_ETAG_PREFIX)
+    ):
+        headers = {"If-None-Match": cached[1]}
+
     start_time = time.time()
-    response = make_request_with_retry(s, url)
+    response = make_request_with_retry(s, url, headers=headers)
     api_time = time.time() - start_time
 
     if response is None:
         print_log(f"请求失败 - {region}_{delay}_{universe}", "ERROR")
         return None
 
+    if response.status_code == 304 and cached is not None:
+        return cached[0]
+
     # 检查响应状态码
     if response.status_code != 200:
         print_log(
             f"API请求失败 - {region}_{delay}_{universe}, 状态码: {response.status_code}",
             "ERROR",
         )
-        print_log(f"响应内容: {response.text[:200]}...", "ERROR")
+        print_log(f"响应内容: {_response_snippet(response)}...", "ERROR")
         return None
 
     # 检查响应内容
     try:
-        data = response.json()
+        data = _json_loads(response.content)
     except json.JSONDecodeError as e:
         print_log(f"JSON解析失败 - {region}_{delay}_{universe}", "ERROR")
-        print_log(f"响应内容: {response.text[:200]}...", "ERROR")
+        print_log(f"响应内容: {_response_snippet(response)}...", "ERROR")
         print_log(f"错误详情: {e}", "ERROR")
         return None
 
     # 保存到本地缓存
+    _write_cached_data_fields(
+        region, delay, universe, data, response.headers.get("ETag")
+    )
+
+    return data
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    """获取数据字段缓存，首次使用时创建数据库"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DataFieldsCache(CACHE_DB_PATH)
+    return _cache
+
+
+def _decode_cached_data_fields(key, payload):
+    """解析缓存内容，损坏时删除该条缓存并返回 None"""
     try:
-        with open(file_path, "w") as f:
-            json.dump(data, f)
+        return _json_loads(payload)
+    except json.JSONDecodeError:
+        print_log(f"缓存数据损坏，将重新获取: {'_'.join(map(str, key))}", "WARNING")
+        _get_cache().delete(*key)
+        return None
+
+
+def _read_cached_data_fields(region, delay, universe):
+    """读取数据字段缓存及其 ETag，返回 (数据, etag)，不存在或损坏时返回 None"""
+    entry = _get_cache().get_entry(region, delay, universe)
+    if entry is None:
+        return None
+    payload, etag = entry
+    data = _decode_cached_data_fields((region, delay, universe), payload)
+    return None if data is None else (data, etag)
+
+
+def _response_snippet(response, limit=200):
+    """只解码响应体的前 limit 个字节用于日志"""
+    return response.content[:limit].decode("utf-8", "replace")
+
+
+def _write_cached_data_fields(region, delay, universe, data, etag=None):
+    """写入数据字段缓存"""
+    try:
+        _get_cache().put(region, delay, universe, _json_dumps(data), etag)
     except Exception as e:
         print_log(f"保存缓存失败: {e}", "ERROR")
 
-    return data
+
+# 由地区列表拆分写入的缓存，ETag 记为 "region:<地区列表的 ETag>"，
+# 只能通过地区列表的条件请求重新校验，不能用于单个组合的请求
+_REGION_ETAG_PREFIX = "region:"
+
+
+def _region_etag(etag):
+    """地区列表的 ETag 转换为拆分写入缓存时使用的标记"""
+    return f"{_REGION_ETAG_PREFIX}{etag}" if etag else None
+
+
+# 地区列表是分页返回的，首页出现截断后本进程内不再请求地区列表
+_region_listing_truncated = False
+
+
+def _fetch_region_data_fields(session, region, etag=None):
+    """
+    一次请求获取地区下所有数据字段，并按 (delay, universe) 拆分
+
+    只有 count 与返回的条数一致（即列表完整、没有分页）时才使用地区列表，
+    否则拆分出的组合会缺少字段。count 大于返回条数时记录截断，
+    之后的地区直接逐个组合请求
+
+    Args:
+        etag: 地区列表的 ETag，提供时发送条件请求
+
+    Returns:
+        tuple: (状态码, {(region, delay, universe): 数据}, 地区列表的 ETag)，
+            列表不可用时数据为 None，未变化时状态码为 304
+    """
+    url = f"{BASE_URL}/data-fields?region={region}&instrumentType=EQUITY"
+    headers = {"If-None-Match": etag} if etag else None
+    try:
+        response = make_request_with_retry(session, url, headers=headers)
+    except _REQUEST_ERRORS:
+        return None, None, None
+    if response is None:
+        return None, None, None
+    if response.status_code != 200:
+        return response.status_code, None, None
+
+    try:
+        data = _json_loads(response.content)
+    except json.JSONDecodeError:
+        return response.status_code, None, None
+
+    global _region_listing_truncated
+    results = data.get("results") if isinstance(data, dict) else None
+    if results and isinstance(data.get("count"), int) and data["count"] > len(results):
+        _region_listing_truncated = True
+        return response.status_code, None, None
+    if (
+        not results
+        or data.get("count") != len(results)
+        or not all(
+            isinstance(item, dict) and "delay" in item and "universe" in item
+            for item in results
+        )
+    ):
+        return response.status_code, None, None
+
+    grouped = {}
+    for item in results:
+        grouped.setdefault((region, item["delay"], item["universe"]), []).append(item)
+    listing = {
+        key: {"count": len(items), "results": items} for key, items in grouped.items()
+    }
+    return response.status_code, listing, response.headers.get("ETag")
+
+
+def _fetch_by_region(session, combinations, max_workers=8, etags=None):
+    """
+    按地区合并请求，返回仍需逐个组合请求的列表及成功数量
+
+    地区接口缺少某个组合或列表不完整时，该组合回退到逐个请求。先单独请求
+    第一个地区，发现列表被分页截断时其余地区不再请求
+
+    Args:
+        etags: {地区: 地区列表的 ETag}，重新校验时提供。地区列表未变化（304）时，
+            带有相同标记的组合视为已确认
+    """
+    etags = etags or {}
+    by_region = {}
+    for combo in combinations:
+        by_region.setdefault(combo[0], []).append(combo)
+
+    def fetch(region):
+        return _fetch_region_data_fields(session, region, etags.get(region))
+
+    regions = [] if _region_listing_truncated else list(by_region)
+    region_results = {}
+    if regions:
+        region_results[regions[0]] = fetch(regions[0])
+    if len(regions) > 1 and not _region_listing_truncated:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            region_results.update(zip(regions[1:], executor.map(fetch, regions[1:])))
+
+    remaining = []
+    success_count = 0
+    for region, region_combos in by_region.items():
+        status, listing, etag = region_results.get(region, (None, None, None))
+        if status == 304:
+            success_count += len(region_combos)
+            continue
+        if listing is None:
+            remaining.extend(region_combos)
+            continue
+        for combo in region_combos:
+            data = listing.get(combo)
+            if data is None:
+                remaining.append(combo)
+                continue
+            _write_cached_data_fields(*combo, data, _region_etag(etag))
+            success_count += 1
+    return remaining, success_count
+
+
+def _revalidate_by_region(session, combinations):
+    """
+    重新校验由地区列表写入的缓存，返回仍需逐个组合请求的列表及成功数量
+
+    同一地区中标记相同的组合共用一次地区列表的条件请求
+    """
+    remaining = []
+    region_etags = {}
+    by_region = {}
+    for combo in combinations:
+        entry = _get_cache().get_entry(*combo)
+        etag = entry[1] if entry else None
+        if not etag or not etag.startswith(_REGION_ETAG_PREFIX):
+            remaining.append(combo)
+            continue
+        etag = etag[len(_REGION_ETAG_PREFIX) :]
+        # 同一地区的组合可能来自不同版本的列表，只有与首个标记相同的才合并校验
+        if region_etags.setdefault(combo[0], etag) == etag:
+            by_region.setdefault(combo[0], []).append(combo)
+        else:
+            remaining.append(combo)
+
+    if not by_region:
+        return remaining, 0
+    region_remaining, success_count = _fetch_by_region(
+        session,
+        [combo for combos in by_region.values() for combo in combos],
+        etags=region_etags,
+    )
+    return remaining + region_remaining, success_count
+
+
+def _prefetch_cached_fields(combinations):
+    """
+    一次查询读取所有组合的本地缓存
+
+    Returns:
+        dict: {(region, delay, universe): 缓存数据或 None}
+    """
+    cached = dict.fromkeys(combinations)
+    # 数据库中 delay 以文本保存
+    lookup = {(r, str(d), u): (r, d, u) for r, d, u in combinations}
+    for key, payload in list(_get_cache().items()):
+        combo = lookup.get(key)
+        if combo is not None:
+            cached[combo] = _decode_cached_data_fields(combo, payload)
+    return cached
 
 
 def get_settings():
     print_log("开始获取设置数据...")
 
-    if os.path.exists(f"{DATA_DIR}/settings.json"):
+    if _is_cached(SETTINGS_JSON):
         print_log("从本地缓存读取设置数据")
-        with open(f"{DATA_DIR}/settings.json", "r") as f:
-            settings = json.load(f)
+        with open(SETTINGS_JSON, "rb") as f:
+            settings = _json_loads(f.read())
     else:
         print_log("从API获取设置数据...")
         s = login()
@@ -298,38 +791,47 @@ def get_settings():
             print_log("登录失败，无法获取设置数据", "ERROR")
             return None
 
-        response = s.options(f"{BASE_URL}/simulations").json()
+        response = _json_loads(s.options(f"{BASE_URL}/simulations").content)
         settings = response["actions"]["POST"]["settings"]["children"]
-        with open(f"{DATA_DIR}/settings.json", "w") as f:
-            json.dump(settings, f)
+        with open(SETTINGS_JSON, "wb") as f:
+            f.write(_json_dumps(settings))
         print_log("设置数据已保存到缓存")
 
     return settings
 
 
 def get_combinations(settings):
+    """
+    展开所有 (region, delay, universe) 组合
+
+    Returns:
+        list: [(region, delay, universe), ...]
+    """
     regions = settings["region"]["choices"]["instrumentType"]["EQUITY"]
     delays = settings["delay"]["choices"]["instrumentType"]["EQUITY"]
     universes = settings["universe"]["choices"]["instrumentType"]["EQUITY"]
-    combinations = []
-    for region in regions:
-        region_value = region["value"]
-        region_delays = delays["region"].get(region_value, [])
-        region_universes = universes["region"].get(region_value, [])
-
-        for delay in region_delays:
-            for universe in region_universes:
-                combinations.append(
-                    {
-                        "region": region_value,
-                        "delay": delay["value"],
-                        "universe": universe["value"],
-                    }
-                )
-    return combinations
+    region_map = {
+        region["value"]: (
+            tuple(d["value"] for d in delays["region"].get(region["value"], [])),
+            tuple(u["value"] for u in universes["region"].get(region["value"], [])),
+        )
+        for region in regions
+    }
+    return [
+        (region_value, delay, universe)
+        for region_value, (region_delays, region_universes) in region_map.items()
+        for delay, universe in itertools.product(region_delays, region_universes)
+    ]
 
 
-def get_all_data_fields():
+def get_all_data_fields(max_concurrency=10, revalidate=False):
+    """
+    并发获取所有组合的数据字段
+
+    Args:
+        max_concurrency: 同时进行的请求数上限
+        revalidate: 是否用条件请求重新校验已缓存的组合
+    """
     print_log("开始获取所有数据字段...")
 
     settings = get_settings()
@@ -341,74 +843,104 @@ def get_all_data_fields():
 
     print_log(f"总共需要处理 {len(all_combinations)} 个组合")
 
-    success_count = 0
-    failed_count = 0
-    consecutive_failures = 0  # 连续失败计数
-
-    # 动态调整请求间隔
-    base_delay = 0.5  # 基础间隔0.5秒
-    current_delay = base_delay
-    max_delay = 5.0  # 最大间隔5秒
-
-    print_log("开始批量处理数据字段请求...")
-
-    # 使用两个tqdm进度条：一个显示进度，一个显示状态
-    with tqdm(
-        all_combinations, desc="获取数据字段", unit="个组合", position=0, leave=True
-    ) as pbar, tqdm(
-        total=0, desc="", position=1, leave=True, bar_format="{desc}"
-    ) as status_bar:
-        for i, combo in enumerate(pbar):
-            region = combo["region"]
-            delay = combo["delay"]
-            universe = combo["universe"]
-
-            # 更新处理状态（在第二个进度条位置）
-            pbar.set_description(f"正在处理 {region}_{delay}_{universe} ")
-
-            # 根据连续失败情况调整请求间隔
-            if consecutive_failures > 2:
-                current_delay = min(current_delay * 1.5, max_delay)
-                print_log(
-                    f"连续失败 {consecutive_failures} 次，增加请求间隔到 {current_delay:.2f} 秒",
-                    "WARNING",
-                )
+    # 先用一次查询读取本地缓存，只有未命中的组合才发起网络请求
+    cached = _prefetch_cached_fields(all_combinations)
+    pending_combinations = [
+        combo for combo in all_combinations if cached[combo] is None
+    ]
+    cached_count = len(all_combinations) - len(pending_combinations)
+    print_log(f"本地缓存命中 {cached_count} 个组合")
+
+    # 重新校验时，已缓存的组合也逐个发送条件请求
+    revalidating = (
+        [combo for combo in all_combinations if cached[combo] is not None]
+        if revalidate
+        else []
+    )
 
-            data_fields = get_data_fields(
-                region, delay, universe, request_delay=current_delay
-            )
+    success_count, failed_count = cached_count - len(revalidating), 0
+    if pending_combinations or revalidating:
+        print_log("开始批量处理数据字段请求...")
+
+        # 所有请求共用同一个会话及其连接池
+        session = login()
 
-            if data_fields is not None:
-                count = data_fields.get("count", "N/A")
-                # 更新状态为成功信息
-                status_bar.set_description(
-                    f"✓ 成功获取 [{region}_{delay}_{universe}] 数据字段，数量 {count}"
+        if session is None:
+            # 登录失败时不再把组合分发给工作线程，避免每个组合各自重试登录
+            failed_count = len(pending_combinations) + len(revalidating)
+            print_log(f"登录失败，{failed_count} 个组合未获取", "ERROR")
+        else:
+            if pending_combinations:
+                # 先按地区合并请求，剩余的组合再逐个请求
+                pending_combinations, region_success = _fetch_by_region(
+                    session, pending_combinations
                 )
-                success_count += 1
-                consecutive_failures = 0  # 重置连续失败计数
+                success_count += region_success
+                print_log(f"按地区合并请求获取 {region_success} 个组合")
 
-                # 成功后逐渐减少请求间隔
-                if consecutive_failures == 0 and current_delay > base_delay:
-                    current_delay = max(current_delay * 0.9, base_delay)
-            else:
-                # 更新状态为失败信息
-                status_bar.set_description(
-                    f"✗ 获取 [{region}_{delay}_{universe}] 数据字段失败"
+            if revalidating:
+                # 由地区列表写入的缓存按地区发送条件请求
+                revalidating, region_checked = _revalidate_by_region(
+                    session, revalidating
                 )
-                failed_count += 1
-                consecutive_failures += 1
+                success_count += region_checked
 
-                # 如果连续失败过多，暂停一段时间
-                if consecutive_failures >= 5:
-                    pause_time = 10
-                    print_log(
-                        f"连续失败 {consecutive_failures} 次，暂停 {pause_time} 秒...",
-                        "WARNING",
-                    )
-                    time.sleep(pause_time)
-                    consecutive_failures = 0  # 重置计数
+            pending_combinations += revalidating
+            if pending_combinations:
+                fetched_success, failed_count = _fetch_all_data_fields(
+                    session, pending_combinations, max_concurrency, revalidate
+                )
+                success_count += fetched_success
 
     print_log(
         f"数据字段获取完成！成功: {success_count}, 失败: {failed_count}", "SUCCESS"
     )
     return success_count, failed_count
+
+
+def _fetch_all_data_fields(
+    session, all_combinations, max_concurrency, revalidate=False
+):
+    """在线程池中并发执行 get_data_fields，按完成顺序更新进度"""
+    success_count = 0
+    failed_count = 0
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        # 请求速率由共享的令牌桶控制，工作线程内不再额外等待
+        futures = {
+            executor.submit(
+                get_data_fields,
+                *combo,
+                request_delay=0,
+                session=session,
+                revalidate=revalidate,
+            ): combo
+            for combo in all_combinations
+        }
+
+        # 单个进度条，限制刷新频率；状态只在成功/失败切换时更新
+        last_ok = None
+        with tqdm(
+            total=len(futures),
+            desc="获取数据字段",
+            unit="个组合",
+            miniters=5,
+            mininterval=0.25,
+        ) as pbar:
+            for future in as_completed(futures):
+                region, delay, universe = futures[future]
+                ok = future.result() is not None
+                if ok:
+                    success_count += 1
+                else:
+                    failed_count += 1
+
+                if ok != last_ok:
+                    status = "✓ 成功" if ok else "✗ 失败"
+                    pbar.set_postfix_str(
+                        f"{status} [{region}_{delay}_{universe}]", refresh=False
+                    )
+                    last_ok = ok
+                pbar.update(1)
+
+    return success_count, failed_count
@@ -1,19 +1,26 @@
+import csv
+import functools
 import json
-import pandas as pd
-from lark import Lark, Transformer, exceptions
+from lark import Lark, Transformer, Tree, exceptions
+from lark.lexer import Token
 import re
 import os
-from typing import List, Tuple, Dict, Any, Optional, Set
+import marshal
+import sys
+import textwrap
+import threading
+from typing import List, Tuple, Dict, Any, Optional, Set, Callable, NamedTuple, Union
 from dataclasses import dataclass
 
-from .utils.fetch_data import DATA_DIR
+from .config import DATA_DIR
+from .exceptions import InvalidCombinationError, _DATACLASS_SLOTS
 
 # ====== 类型定义 ======
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ValidationError:
-    """验证错误信息"""
+    """验证错误信息，不可变：缓存的验证结果会被多个调用方共享"""
 
     message: str
     line: Optional[int] = None
@@ -22,37 +29,203 @@ class ValidationError:
     suggestion: Optional[str] = None
 
 
+class ValidatorKey(NamedTuple):
+    """验证器配置组合 (地区, 延迟, 股票池)"""
+
+    region: str
+    delay: int
+    universe: str
+
+
+class OpSpec(NamedTuple):
+    """操作符定义中类型检查用到的字段，加载数据时一次性解析"""
+
+    min_args: int
+    max_args: Optional[int]
+    arg_types: list
+    kwarg_types: dict
+    kwarg_names: frozenset
+    var_args_type: Any
+    choices: dict
+    return_type: str
+
+    @classmethod
+    def from_definition(cls, op: Dict[str, Any]) -> "OpSpec":
+        """从 valid_ops.json 中的单个操作符定义构建"""
+        kwarg_types = op.get("kwarg_types", {})
+        return cls(
+            min_args=op.get("min_args", 0),
+            max_args=op.get("max_args"),
+            arg_types=op.get("arg_types", []),
+            kwarg_types=kwarg_types,
+            kwarg_names=frozenset(kwarg_types),
+            var_args_type=op.get("var_args_type"),
+            choices=op.get("choices", {}),
+            return_type=op.get("return_type", "unknown"),
+        )
+
+
+def format_error(error: ValidationError) -> str:
+    """将错误格式化为展示用的字符串"""
+    error_msg = error.message
+    if error.line and error.column:
+        error_msg = f"第{error.line}行第{error.column}列: {error.message}"
+    if error.suggestion:
+        error_msg += f" ({error.suggestion})"
+    return error_msg
+
+
+# ====== 预编译的正则表达式 ======
+
+# 多行注释 /* ... */
+_MULTILINE_COMMENT_PATTERN = re.compile(r"/\*.*?\*/", re.DOTALL)
+# 完整的标识符
+_IDENTIFIER_PATTERN = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+# 表达式中的标识符
+_WORD_PATTERN = re.compile(r"\b[a-zA-Z_][a-zA-Z0-9_]*\b")
+# 以数字开头的标识符
+_DIGIT_START_PATTERN = re.compile(r"\b\d+[a-zA-Z_][a-zA-Z0-9_]*\b")
+# 允许的字符
+_ALLOWED_CHAR_PATTERN = re.compile(r'[a-zA-Z0-9_\s=+\-*/()><=!;.,"\'#]')
+# 删除所有允许的 ASCII 字符的转换表，剩余字符才需要逐个检查
+_ALLOWED_ASCII_CHARS = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_"
+    " \t\n\r\f\v=+-*/()><!;.,\"'#"
+)
+_ALLOWED_ASCII_TRANS = str.maketrans("", "", _ALLOWED_ASCII_CHARS)
+# 含多个小数点的数字
+_MULTI_DOT_NUMBER_PATTERN = re.compile(r"\b\d+\.\d+\.\d+\b")
+# 连续操作符
+_CONSECUTIVE_OP_PATTERN = re.compile(r"[+\-*/]{2,}")
+# 单次扫描一行时关注的记号，合法的行通常没有任何匹配
+_LINE_TOKEN_PATTERN = re.compile(
+    r"(?=[\d_a-zA-Z+\-*/])(?:"
+    r"(?P<number>\b\d+\.\d+\.\d+\b)"
+    r"|(?P<digit_start>\b\d+[a-zA-Z_][a-zA-Z0-9_]*\b)"
+    r"|(?P<double_underscore>\b(?=[a-zA-Z0-9_]*__)[a-zA-Z_][a-zA-Z0-9_]*\b)"
+    r"|(?P<operator>[+\-*/]{2,})"
+    r")"
+)
+# 紧跟左括号的完整单词，即函数调用名
+_CALL_NAME_PATTERN = re.compile(r"(\w+)\s*\(")
+# 紧跟等号的标识符字符序列，即赋值或命名参数的左侧
+_ASSIGN_TARGET_PATTERN = re.compile(r"([a-zA-Z0-9_]+)\s*=")
+# 左括号或等号
+_PAREN_OR_EQUAL_PATTERN = re.compile(r"[(=]")
+# 括号以外的字符
+_NON_PAREN_PATTERN = re.compile(r"[^()]+")
+# 中文字符及全角符号，均在 ASCII 范围之外，纯 ASCII 字符串可跳过匹配
+_CHINESE_PATTERN = re.compile(r"[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]")
+# Lark 错误信息中的位置
+_ERROR_POSITION_PATTERN = re.compile(r"at line (\d+), column (\d+)")
+# 参数开头的 "名称=" 形式（排除 ==），即命名参数
+_KEYWORD_ARG_PATTERN = re.compile(r"\s*([a-zA-Z_]\w*)\s*=(?!=)")
+# 操作符定义中第一个括号内的参数
+_DEFINITION_PARAMS_PATTERN = re.compile(r"\w+\(([^)]*)\)")
+# 参数定义的分类：标识符、字符串字面量、数字字面量
+_PARAM_TYPE_PATTERN = re.compile(
+    r"^(?P<field_or_number>[a-zA-Z_][a-zA-Z0-9_]*)$"
+    r'|^(?P<string>".*"|\'.*\')$'
+    r"|^(?P<number>-?\d+(?:\.\d+)?)$"
+)
+
 # ====== 2. 加载权限数据 ======
 # 获取包目录
 package_dir = os.path.dirname(os.path.abspath(__file__))
 
 # 全局变量，将在首次使用时初始化
-operators_df = None
+operators_rows = None
 valid_operator_names = None
 data_fields_dict = None
 OP_PARAM_TYPES = None
 valid_ops = None
+op_specs = None
 
 # ====== 1. 加载 grammar 文件 ======
 grammar_path = os.path.join(package_dir, "grammar.lark")
 with open(grammar_path, "r") as f:
     grammar = f.read()
 
-parser = Lark(grammar, start="start", parser="lalr")
+# cache=True 将构建好的 LALR 分析表缓存到临时目录，之后的进程直接加载
+parser = Lark(grammar, start="start", parser="lalr", cache=True)
+
+
+# 数据快照文件名，保存解析后的数据，源文件未变化时跳过 CSV/JSON 解析
+_SNAPSHOT_NAME = "_cache.marshal"
+_SNAPSHOT_SOURCES = ("operators.csv", "data_fields.json", "valid_ops.json")
+# 快照内容的格式版本，格式变化时递增
+_SNAPSHOT_VERSION = 3
+
+
+def _snapshot_key(data_dir):
+    """以源文件的修改时间和大小作为快照的键，文件缺失时返回 None"""
+    try:
+        stats = [os.stat(os.path.join(data_dir, name)) for name in _SNAPSHOT_SOURCES]
+    except OSError:
+        return None
+    # marshal 格式随 Python 版本变化，一并作为键的一部分
+    return (_SNAPSHOT_VERSION, marshal.version) + tuple(
+        (st.st_mtime_ns, st.st_size) for st in stats
+    )
+
+
+def _load_snapshot(data_dir, key):
+    """读取数据快照，键不匹配或读取失败时返回 None"""
+    try:
+        with open(os.path.join(data_dir, _SNAPSHOT_NAME), "rb") as f:
+            snapshot_key, payload = marshal.load(f)
+    except Exception:
+        return None
+    if snapshot_key != key or not isinstance(payload, tuple) or len(payload) != 4:
+        return None
+    return payload
+
+
+def _save_snapshot(data_dir, key, payload):
+    """写入数据快照，先写临时文件再原子替换，失败时忽略"""
+    snapshot_file = os.path.join(data_dir, _SNAPSHOT_NAME)
+    tmp_file = snapshot_file + ".tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            marshal.dump((key, payload), f)
+        os.replace(tmp_file, snapshot_file)
+    except (OSError, ValueError):
+        pass
+
+
+def _intern_operator_names(names):
+    """驻留操作符名，集合查找时可直接按指针比较"""
+    return frozenset(sys.intern(name) for name in names)
+
+
+def _intern_data_fields(fields):
+    """驻留组合键及字段名，每个组合的字段保存为 frozenset，供所有验证器实例共享"""
+    return {
+        sys.intern(key): frozenset(sys.intern(name) for name in names)
+        for key, names in fields.items()
+    }
+
+
+def _intern_valid_ops(ops):
+    """驻留操作符定义的键"""
+    return {sys.intern(name): op for name, op in ops.items()}
+
+
+def _build_op_specs(ops):
+    """为每个操作符构建 OpSpec，类型检查时用属性访问代替多次字典查找"""
+    return {name: OpSpec.from_definition(op) for name, op in ops.items()}
 
 
 def _load_data():
     """加载必要的数据文件"""
-    global operators_df, valid_operator_names, data_fields_dict, valid_ops
+    global operators_rows, valid_operator_names, data_fields_dict, valid_ops, op_specs
 
     # 优先从当前目录加载数据（开发环境），否则从用户配置目录加载（生产环境）
     current_data_dir = os.path.join(os.getcwd(), "data")
     user_data_dir = os.path.expanduser("~/.wqb_validator/data")
 
     # 检查当前目录是否有数据文件（开发环境）
-    if os.path.exists(current_data_dir) and os.path.exists(
-        os.path.join(current_data_dir, "operators.csv")
-    ):
+    if os.path.exists(os.path.join(current_data_dir, "operators.csv")):
         data_dir = current_data_dir
         print(f"📁 使用开发环境数据: {data_dir}")
     else:
@@ -66,15 +239,39 @@ def _load_data():
             "然后运行 'wqb-data fetch' 下载数据。"
         )
 
-    if operators_df is None:
+    # 首次加载时优先使用数据快照。快照只保存在用户自己的数据目录中，
+    # 不读写当前目录下的开发数据，避免加载或留下不受信任的文件
+    key = None
+    if (
+        data_dir == user_data_dir
+        and operators_rows is None
+        and data_fields_dict is None
+        and valid_ops is None
+    ):
+        key = _snapshot_key(data_dir)
+        payload = key and _load_snapshot(data_dir, key)
+        if payload:
+            # 反序列化得到的字符串不保证被驻留，需要重新驻留
+            operators_rows, operator_names, fields, ops = payload
+            valid_operator_names = _intern_operator_names(operator_names)
+            data_fields_dict = _intern_data_fields(fields)
+            valid_ops = _intern_valid_ops(ops)
+            op_specs = _build_op_specs(valid_ops)
+            return
+
+    if operators_rows is None:
         operators_file = os.path.join(data_dir, "operators.csv")
         if not os.path.exists(operators_file):
             raise FileNotFoundError(
                 f"操作符文件不存在: {operators_file}\n"
                 "请运行 'wqb-data fetch' 下载数据。"
             )
-        operators_df = pd.read_csv(operators_file)
-        valid_operator_names = set(operators_df["name"].dropna().unique())
+        # 只需要 name 和 definition 两列，用标准库读取即可
+        with open(operators_file, "r", encoding="utf-8", newline="") as f:
+            operators_rows = list(csv.DictReader(f))
+        valid_operator_names = _intern_operator_names(
+            row["name"] for row in operators_rows if row.get("name")
+        )
 
     if data_fields_dict is None:
         data_fields_file = os.path.join(data_dir, "data_fields.json")
@@ -84,7 +281,7 @@ def _load_data():
                 "请运行 'wqb-data fetch' 下载数据。"
             )
         with open(data_fields_file, "r") as f:
-            data_fields_dict = json.load(f)
+            data_fields_dict = _intern_data_fields(json.load(f))
 
     if valid_ops is None:
         valid_ops_file = os.path.join(data_dir, "valid_ops.json")
@@ -94,24 +291,27 @@ def _load_data():
                 "请运行 'wqb-data fetch' 下载数据。"
             )
         with open(valid_ops_file, "r") as f:
-            valid_ops = json.load(f)
+            valid_ops = _intern_valid_ops(json.load(f))
+        op_specs = _build_op_specs(valid_ops)
+
+    if key is not None:
+        _save_snapshot(
+            data_dir,
+            key,
+            (operators_rows, valid_operator_names, data_fields_dict, valid_ops),
+        )
 
 
 # ====== 参数类型推断辅助 ======
 def parse_param_type(param):
     param = param.strip()
-    # 形如 x, y, z, input, group, field, alpha 等，视为 field/number
-    if re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", param):
-        return "field_or_number"
+    # 一次匹配完成分类，匹配的分组名即类型：
+    # 形如 x, y, z, input, group, field, alpha 等（包括 true/false），视为 field/number
     # 形如 "abc" 或 'abc'，视为 string
-    if re.match(r'^".*"$|^\'.*\'$', param):
-        return "string"
-    # 形如 true/false
-    if param in ["true", "false", "True", "False"]:
-        return "bool"
-    # 形如 1, 1.0, 0.5
-    if re.match(r"^-?\d+(\.\d+)?$", param):
-        return "number"
+    # 形如 1, 1.0, 0.5，视为 number
+    m = _PARAM_TYPE_PATTERN.match(param)
+    if m:
+        return m.lastgroup
     # 形如 x=1, y="abc", filter=false
     if "=" in param:
         key, value = param.split("=", 1)
@@ -124,7 +324,7 @@ def parse_operator_param_types(definition):
     返回位置参数类型列表和命名参数类型dict
     """
     # 只取第一个括号内的参数
-    m = re.search(r"\w+\(([^)]*)\)", definition)
+    m = _DEFINITION_PARAMS_PATTERN.search(definition)
     if not m:
         return [], {}
     params = m.group(1)
@@ -144,11 +344,9 @@ def parse_operator_param_types(definition):
 def operator_param_types_map():
     _load_data()  # 确保数据已加载
     mapping = {}
-    for _, row in operators_df.iterrows():
-        name = row["name"]
-        definition = str(row["definition"])
-        pos_types, kw_types = parse_operator_param_types(definition)
-        mapping[name] = {"pos": pos_types, "kw": kw_types}
+    for row in operators_rows:
+        pos_types, kw_types = parse_operator_param_types(row.get("definition") or "")
+        mapping[row["name"]] = {"pos": pos_types, "kw": kw_types}
     return mapping
 
 
@@ -160,6 +358,21 @@ def get_op_param_types():
     return OP_PARAM_TYPES
 
 
+def compile_name_checker(names) -> Callable[[str], bool]:
+    """
+    为固定的名称集合生成专用的成员检查函数
+
+    集合以 frozenset 字面量的形式写入生成的源码，调用时无需属性查找
+    """
+    src = textwrap.dedent(f"""
+        def _check_name(n, _V={frozenset(names)!r}):
+            return n in _V
+        """)
+    ns = {}
+    exec(src, ns)
+    return ns["_check_name"]
+
+
 # ====== 基础验证器类 ======
 
 
@@ -208,20 +421,20 @@ class CharacterValidator(BaseValidator):
     def __init__(self):
         super().__init__()
         # 允许的字符模式
-        self.allowed_pattern = re.compile(r'[a-zA-Z0-9_\s=+\-*/()><=!;.,"\'#]')
+        self.allowed_pattern = _ALLOWED_CHAR_PATTERN
         # 标识符模式
-        self.identifier_pattern = re.compile(r"\b[a-zA-Z_][a-zA-Z0-9_]*\b")
+        self.identifier_pattern = _WORD_PATTERN
         # 数字模式
-        self.number_pattern = re.compile(r"\b\d+\.\d+\.\d+\b")
+        self.number_pattern = _MULTI_DOT_NUMBER_PATTERN
         # 连续操作符模式
-        self.op_pattern = re.compile(r"[+\-*/]{2,}")
+        self.op_pattern = _CONSECUTIVE_OP_PATTERN
 
     def validate(self, expr: str) -> List[ValidationError]:
         """验证字符和格式"""
         self.clear()
 
         # 去除多行注释
-        expr = re.sub(r"/\*.*?\*/", "", expr, flags=re.DOTALL)
+        expr = _MULTILINE_COMMENT_PATTERN.sub("", expr)
 
         lines = expr.splitlines()
         for line_idx, line in enumerate(lines):
@@ -241,14 +454,8 @@ class CharacterValidator(BaseValidator):
             # 验证字符
             self._validate_characters(code_part, line_idx + 1)
 
-            # 验证标识符
-            self._validate_identifiers(code_part, line_idx + 1)
-
-            # 验证数字格式
-            self._validate_numbers(code_part, line_idx + 1)
-
-            # 验证操作符
-            self._validate_operators(code_part, line_idx + 1)
+            # 一次扫描验证标识符、数字格式和操作符
+            self._scan_line(code_part, line_idx + 1)
 
             # 验证字符串
             self._validate_strings(code_part, line_idx + 1)
@@ -260,6 +467,9 @@ class CharacterValidator(BaseValidator):
 
     def _validate_characters(self, code_part: str, line_num: int):
         """验证非法字符"""
+        # 一次 C 层扫描删除所有允许的字符，没有剩余时无需逐字符检查
+        if not code_part.translate(_ALLOWED_ASCII_TRANS):
+            return
         for i, char in enumerate(code_part):
             if not self.allowed_pattern.match(char):
                 self.add_error(
@@ -273,54 +483,82 @@ class CharacterValidator(BaseValidator):
     def _validate_identifiers(self, code_part: str, line_num: int):
         """验证标识符格式"""
         # 检查以数字开头的标识符
-        digit_start_pattern = re.compile(r"\b\d+[a-zA-Z_][a-zA-Z0-9_]*\b")
-        for match in digit_start_pattern.finditer(code_part):
-            identifier = match.group()
-            self.add_error(
-                f"标识符 '{identifier}' 不能以数字开头",
-                line=line_num,
-                column=match.start() + 1,
-                code=code_part,
-                suggestion="标识符应以字母或下划线开头",
-            )
+        for match in _DIGIT_START_PATTERN.finditer(code_part):
+            self._add_digit_start_error(match, code_part, line_num)
 
         # 检查连续下划线
         for match in self.identifier_pattern.finditer(code_part):
-            identifier = match.group()
-            if "__" in identifier:
-                self.add_error(
-                    f"标识符 '{identifier}' 不能包含连续下划线",
-                    line=line_num,
-                    column=match.start() + 1,
-                    code=code_part,
-                    suggestion="避免使用连续下划线",
-                )
+            if "__" in match.group():
+                self._add_double_underscore_error(match, code_part, line_num)
 
         return self.errors
 
     def _validate_numbers(self, code_part: str, line_num: int):
         """验证数字格式"""
         for match in self.number_pattern.finditer(code_part):
-            number = match.group()
-            self.add_error(
-                f"数字 '{number}' 格式错误，不能有多个小数点",
-                line=line_num,
-                column=match.start() + 1,
-                code=code_part,
-                suggestion="数字只能有一个小数点",
-            )
+            self._add_number_error(match, code_part, line_num)
 
     def _validate_operators(self, code_part: str, line_num: int):
         """验证操作符使用"""
         for match in self.op_pattern.finditer(code_part):
-            op = match.group()
-            self.add_error(
-                f"连续操作符 '{op}' 不合法",
-                line=line_num,
-                column=match.start() + 1,
-                code=code_part,
-                suggestion="请检查操作符使用是否正确",
-            )
+            self._add_operator_error(match, code_part, line_num)
+
+    def _scan_line(self, code_part: str, line_num: int):
+        """
+        单次扫描完成标识符、数字格式和操作符的验证
+
+        各类记号互不重叠，按类别分组后依次报告，错误顺序与逐项验证一致
+        """
+        found = {}
+        for match in _LINE_TOKEN_PATTERN.finditer(code_part):
+            found.setdefault(match.lastgroup, []).append(match)
+        if not found:
+            return
+
+        for kind, add_error in (
+            ("digit_start", self._add_digit_start_error),
+            ("double_underscore", self._add_double_underscore_error),
+            ("number", self._add_number_error),
+            ("operator", self._add_operator_error),
+        ):
+            for match in found.get(kind, ()):
+                add_error(match, code_part, line_num)
+
+    def _add_digit_start_error(self, match, code_part: str, line_num: int):
+        self.add_error(
+            f"标识符 '{match.group()}' 不能以数字开头",
+            line=line_num,
+            column=match.start() + 1,
+            code=code_part,
+            suggestion="标识符应以字母或下划线开头",
+        )
+
+    def _add_double_underscore_error(self, match, code_part: str, line_num: int):
+        self.add_error(
+            f"标识符 '{match.group()}' 不能包含连续下划线",
+            line=line_num,
+            column=match.start() + 1,
+            code=code_part,
+            suggestion="避免使用连续下划线",
+        )
+
+    def _add_number_error(self, match, code_part: str, line_num: int):
+        self.add_error(
+            f"数字 '{match.group()}' 格式错误，不能有多个小数点",
+            line=line_num,
+            column=match.start() + 1,
+            code=code_part,
+            suggestion="数字只能有一个小数点",
+        )
+
+    def _add_operator_error(self, match, code_part: str, line_num: int):
+        self.add_error(
+            f"连续操作符 '{match.group()}' 不合法",
+            line=line_num,
+            column=match.start() + 1,
+            code=code_part,
+            suggestion="请检查操作符使用是否正确",
+        )
 
     def _validate_strings(self, code_part: str, line_num: int):
         """验证字符串格式"""
@@ -338,27 +576,42 @@ class CharacterValidator(BaseValidator):
 
     def _validate_brackets(self, code_part: str, line_num: int):
         """验证括号匹配"""
-        stack = []
+        if not code_part:
+            return
 
-        for i, char in enumerate(code_part):
+        # 快速路径：左右括号数量相等且任何前缀都不出现多余的右括号时直接通过
+        opens = code_part.count("(")
+        if opens == code_part.count(")"):
+            if not opens:
+                return
+            depth = 0
+            for paren in _NON_PAREN_PATTERN.sub("", code_part):
+                depth += 1 if paren == "(" else -1
+                if depth < 0:
+                    break
+            else:
+                return
+
+        # 慢路径只在括号不配对时执行：栈中保存尚未闭合的左括号位置
+        open_positions = []
+        for pos, char in enumerate(code_part):
             if char == "(":
-                stack.append(("(", i))
+                open_positions.append(pos)
             elif char == ")":
-                if stack and stack[-1][0] == "(":
-                    stack.pop()
-                else:
+                if not open_positions:
                     self.add_error(
                         "括号不匹配，多余的右括号",
                         line=line_num,
-                        column=i + 1,
+                        column=pos + 1,
                         code=code_part,
                         suggestion="请检查括号数量",
                     )
-                    break
+                    return
+                open_positions.pop()
 
-        # 检查未闭合的左括号
-        if stack:
-            last_open_pos = stack[-1][1]
+        # 检查未闭合的左括号：报告最内层（最后一个）未闭合的位置
+        if open_positions:
+            last_open_pos = open_positions[-1]
             self.add_error(
                 "括号不匹配，缺少右括号",
                 line=line_num,
@@ -376,21 +629,23 @@ class SyntaxValidator(BaseValidator):
 
     def __init__(self, grammar_file: str = None):
         super().__init__()
+        self.tree: Optional[Tree] = None
         if grammar_file is None:
-            # 获取包目录
-            package_dir = os.path.dirname(os.path.abspath(__file__))
-            grammar_file = os.path.join(package_dir, "grammar.lark")
+            # 默认语法直接复用模块级解析器，不再重复构建
+            self.parser = parser
+            return
 
         with open(grammar_file, "r") as f:
             grammar = f.read()
-        self.parser = Lark(grammar, start="start", parser="lalr")
+        self.parser = Lark(grammar, start="start", parser="lalr", cache=True)
 
     def validate(self, expr: str) -> List[ValidationError]:
-        """验证语法"""
+        """验证语法，解析成功时语法树保存在 self.tree"""
         self.clear()
+        self.tree = None
 
         try:
-            tree = self.parser.parse(expr)
+            self.tree = self.parser.parse(expr)
             return self.errors
         except exceptions.LarkError as e:
             msg = str(e)
@@ -418,7 +673,7 @@ class SyntaxValidator(BaseValidator):
         self, error_msg: str
     ) -> Tuple[Optional[int], Optional[int]]:
         """提取错误位置"""
-        m = re.search(r"at line (\d+), column (\d+)", error_msg)
+        m = _ERROR_POSITION_PATTERN.search(error_msg)
         if m:
             return int(m.group(1)), int(m.group(2))
         return None, None
@@ -492,23 +747,19 @@ class BusinessRuleValidator(BaseValidator):
 
                 # 检查最后一条语句
                 last_stmt = statements[-1]
-                if "=" in last_stmt:
-                    # 检查是否是函数调用中的命名参数
-                    equal_pos = last_stmt.find("=")
-                    if equal_pos > 0:
-                        before_equal = last_stmt[:equal_pos].strip()
-                        if "(" in before_equal:
-                            # 这是函数调用中的命名参数，不是赋值语句
-                            pass
-                        else:
-                            # 检查等号左边是否是有效的变量名
-                            if re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", before_equal):
-                                self.add_error(
-                                    f"'{last_stmt}' 不能是赋值语句",
-                                    line=line_idx + 1,
-                                    code=line,
-                                    suggestion="最后一行应该是表达式，不能是赋值语句",
-                                )
+                # 一次扫描定位第一个左括号或等号
+                match = _PAREN_OR_EQUAL_PATTERN.search(last_stmt)
+                # 左括号在前说明是函数调用中的命名参数，不是赋值语句
+                if match and match.group() == "=" and match.start() > 0:
+                    before_equal = last_stmt[: match.start()].strip()
+                    # 检查等号左边是否是有效的变量名
+                    if _IDENTIFIER_PATTERN.match(before_equal):
+                        self.add_error(
+                            f"'{last_stmt}' 不能是赋值语句",
+                            line=line_idx + 1,
+                            code=line,
+                            suggestion="最后一行应该是表达式，不能是赋值语句",
+                        )
 
     def _check_expression_structure(self, expr: str):
         """检查表达式结构规则"""
@@ -535,7 +786,7 @@ class BusinessRuleValidator(BaseValidator):
 def filter_comments(expr: str) -> str:
     """过滤注释，只保留代码部分"""
     # 1. 去除多行注释 /* ... */
-    expr = re.sub(r"/\*.*?\*/", "", expr, flags=re.DOTALL)
+    expr = _MULTILINE_COMMENT_PATTERN.sub("", expr)
 
     # 2. 去除单行注释 # ...
     lines = expr.splitlines()
@@ -557,9 +808,15 @@ def filter_comments(expr: str) -> str:
 class DataFieldValidator(BaseValidator):
     """数据字段验证器"""
 
-    def __init__(self, valid_fields: Set[str]):
+    def __init__(
+        self,
+        valid_fields: Set[str],
+        check_name: Optional[Callable[[str], bool]] = None,
+    ):
         super().__init__()
         self.valid_fields = valid_fields
+        # 字段检查函数，未提供时退化为集合成员检查
+        self._check_name = check_name or valid_fields.__contains__
 
     def validate(self, expr: str) -> List[ValidationError]:
         """验证数据字段是否有效"""
@@ -570,7 +827,7 @@ class DataFieldValidator(BaseValidator):
 
         # 验证每个字段
         for field_ref in field_references:
-            if field_ref not in self.valid_fields:
+            if not self._check_name(field_ref):
                 self.add_error(
                     f"无效数据字段: {field_ref}",
                     suggestion="请检查字段名拼写，或查看可用字段列表",
@@ -582,32 +839,34 @@ class DataFieldValidator(BaseValidator):
         """提取表达式中的所有字段引用"""
         # 简单的字段名提取（可以后续优化为AST解析）
         # 匹配形如 field_name 的标识符，排除函数名、变量名和操作符
-        field_pattern = re.compile(r"\b([a-zA-Z_][a-zA-Z0-9_]*)\b")
-        matches = field_pattern.findall(expr)
+        matches = _WORD_PATTERN.findall(expr)
+
+        # 预先扫描一次表达式，收集函数调用名和等号左侧的名字
+        call_names = set(_CALL_NAME_PATTERN.findall(expr))
+        # 名字紧跟等号即视为变量名，包括作为更长单词后缀的情况
+        assigned_names = {
+            target[i:]
+            for target in _ASSIGN_TARGET_PATTERN.findall(expr)
+            for i in range(len(target))
+        }
 
         # 过滤掉函数名（带括号的）、已知的操作符和变量名
         fields = set()
         for match in matches:
             # 检查是否是函数调用
-            if not self._is_function_call(match, expr):
+            if not self._is_function_call(match, call_names):
                 # 检查是否是操作符
                 if not self._is_operator(match):
                     # 检查是否是变量名（在赋值语句左边或函数参数中）
-                    if not self._is_variable_name(match, expr):
+                    if not self._is_variable_name(match, assigned_names):
                         fields.add(match)
 
         return fields
 
-    def _is_variable_name(self, name: str, expr: str) -> bool:
+    def _is_variable_name(self, name: str, assigned_names: Set[str]) -> bool:
         """检查是否是变量名"""
-        # 检查是否在赋值语句左边
-        assignment_pattern = re.compile(rf"\b{re.escape(name)}\s*=")
-        if assignment_pattern.search(expr):
-            return True
-
-        # 检查是否在函数参数中作为命名参数
-        named_param_pattern = re.compile(rf"{re.escape(name)}\s*=")
-        if named_param_pattern.search(expr):
+        # 检查是否在赋值语句左边或作为命名参数
+        if name in assigned_names:
             return True
 
         # 检查是否是布尔值
@@ -616,11 +875,10 @@ class DataFieldValidator(BaseValidator):
 
         return False
 
-    def _is_function_call(self, name: str, expr: str) -> bool:
+    def _is_function_call(self, name: str, call_names: Set[str]) -> bool:
         """检查是否是函数调用"""
         # 简单的检查：名字后面是否有左括号
-        pattern = re.compile(rf"\b{re.escape(name)}\s*\(")
-        return pattern.search(expr) is not None
+        return name in call_names
 
     def _is_operator(self, name: str) -> bool:
         """检查是否是操作符"""
@@ -638,12 +896,19 @@ class OperatorValidator(BaseValidator):
         super().__init__()
         self.operators_data = operators_data
 
-    def validate(self, expr: str) -> List[ValidationError]:
-        """验证操作符使用是否正确"""
+    def validate(self, expr: str, tree: Optional[Tree] = None) -> List[ValidationError]:
+        """
+        验证操作符使用是否正确
+
+        :param tree: 语法验证得到的语法树，提供时直接从中读取函数调用
+        """
         self.clear()
 
-        # 提取表达式中的所有函数调用
-        function_calls = self._extract_function_calls(expr)
+        # 提取表达式中的所有函数调用，没有语法树时退回正则提取
+        if tree is not None:
+            function_calls = self._function_calls_from_tree(tree)
+        else:
+            function_calls = self._extract_function_calls(expr)
 
         # 验证每个函数调用
         for func_call in function_calls:
@@ -653,16 +918,17 @@ class OperatorValidator(BaseValidator):
 
     def _extract_function_calls(self, expr: str) -> List[Dict[str, Any]]:
         """提取表达式中的所有函数调用"""
-        # 简单的函数调用提取（可以后续优化为AST解析）
         function_calls = []
 
-        # 匹配形如 function_name(arg1, arg2, ...) 的模式
-        pattern = re.compile(r"(\w+)\s*\(([^)]*)\)")
-        matches = pattern.finditer(expr)
-
-        for match in matches:
+        # 匹配形如 function_name( 的调用开头，再找到与之配对的右括号，
+        # 嵌套调用的开头同样会被匹配到
+        for match in _CALL_NAME_PATTERN.finditer(expr):
+            end = self._find_closing_paren(expr, match.end())
+            if end is None:
+                # 括号未闭合的调用由语法验证报告，这里跳过
+                continue
             func_name = match.group(1)
-            args_str = match.group(2)
+            args_str = expr[match.end() : end]
 
             # 解析参数
             args = self._parse_arguments(args_str)
@@ -672,30 +938,82 @@ class OperatorValidator(BaseValidator):
                     "name": func_name,
                     "args": args,
                     "position": match.start(),
-                    "full_match": match.group(0),
+                    "full_match": expr[match.start() : end + 1],
                 }
             )
 
         return function_calls
 
+    @staticmethod
+    def _find_closing_paren(expr: str, start: int) -> Optional[int]:
+        """从左括号之后的位置开始，返回与之配对的右括号位置，未闭合时返回 None"""
+        depth = 0
+        quote = None
+        for i in range(start, len(expr)):
+            char = expr[i]
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char == '"' or char == "'":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                if depth == 0:
+                    return i
+                depth -= 1
+            elif char == ";":
+                # 语句结束仍未闭合
+                return None
+        return None
+
+    def _function_calls_from_tree(self, tree: Tree) -> List[Dict[str, Any]]:
+        """从语法树中按出现顺序提取所有函数调用，支持嵌套调用"""
+        function_calls = []
+        for node in tree.iter_subtrees_topdown():
+            if node.data != "function":
+                continue
+            name_token, args_node = node.children
+            arg_nodes = args_node.children if args_node is not None else []
+
+            args = []
+            for i, arg in enumerate(arg_nodes):
+                if isinstance(arg, Tree) and arg.data == "kwarg":
+                    # 命名参数
+                    key, value = arg.children
+                    args.append(
+                        {
+                            "type": "keyword",
+                            "name": str(key),
+                            "value": value,
+                            "position": i,
+                        }
+                    )
+                else:
+                    # 位置参数
+                    args.append({"type": "positional", "value": arg, "position": i})
+
+            function_calls.append({"name": str(name_token), "args": args})
+
+        return function_calls
+
     def _parse_arguments(self, args_str: str) -> List[Dict[str, Any]]:
         """解析函数参数"""
         if not args_str.strip():
             return []
 
         args = []
-        # 简单的参数分割（可以后续优化）
-        arg_parts = [part.strip() for part in args_str.split(",")]
+        arg_parts = self._split_arguments(args_str)
 
         for i, part in enumerate(arg_parts):
-            if "=" in part:
+            keyword = _KEYWORD_ARG_PATTERN.match(part)
+            if keyword:
                 # 命名参数
-                key, value = part.split("=", 1)
                 args.append(
                     {
                         "type": "keyword",
-                        "name": key.strip(),
-                        "value": value.strip(),
+                        "name": keyword.group(1),
+                        "value": part[keyword.end() :].strip(),
                         "position": i,
                     }
                 )
@@ -707,6 +1025,29 @@ class OperatorValidator(BaseValidator):
 
         return args
 
+    @staticmethod
+    def _split_arguments(args_str: str) -> List[str]:
+        """按顶层逗号分割参数，忽略括号和字符串内部的逗号"""
+        parts = []
+        depth = 0
+        quote = None
+        start = 0
+        for i, char in enumerate(args_str):
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char == '"' or char == "'":
+                quote = char
+            elif char == "(" or char == "[":
+                depth += 1
+            elif char == ")" or char == "]":
+                depth -= 1
+            elif char == "," and depth == 0:
+                parts.append(args_str[start:i].strip())
+                start = i + 1
+        parts.append(args_str[start:].strip())
+        return parts
+
     def _validate_function_call(self, func_call: Dict[str, Any]):
         """验证单个函数调用"""
         op_name = func_call["name"]
@@ -751,6 +1092,32 @@ class OperatorValidator(BaseValidator):
 
 
 # ====== 3. 验证器类（用于 AST 遍历） ======
+# 类型推断用的查找表：字面量 Token / 规则直接映射到类型
+_TOKEN_LITERAL_TYPES = {
+    "SIGNED_NUMBER": "number",
+    "ESCAPED_STRING": "string",
+    "BOOLEAN": "boolean",
+}
+_LITERAL_NODE_TYPES = {"number": "number", "string": "string", "boolean": "boolean"}
+# 类型取第一个子节点的规则
+_PASSTHROUGH_NODES = frozenset(
+    ("expr", "logic_or", "logic_and", "logic_not", "comparison", "unary_expr", "atom")
+)
+_ARITHMETIC_NODES = frozenset(("add_expr", "mul_expr"))
+_COMPARISON_NODES = frozenset(("greater", "greater_eq", "less", "less_eq", "eq", "neq"))
+_BOOL_LITERALS = frozenset(("true", "false", "True", "False"))
+# 除类型相同外允许的 (期望类型, 实际类型) 组合：
+# expr 可接受字段，boolean 可接受任意表达式
+_COMPATIBLE_TYPES = frozenset(
+    (
+        ("expr", "field"),
+        ("boolean", "expr"),
+        ("boolean", "field"),
+        ("boolean", "number"),
+    )
+)
+
+
 class ExprValidator(Transformer):
     def __init__(self, valid_field_names):
         super().__init__()
@@ -759,11 +1126,25 @@ class ExprValidator(Transformer):
         self.debug_mode = False  # 调试模式开关
         self.variables = {}  # 变量作用域
         self.variable_exprs = {}  # 变量表达式链路
+        self._resolved_types = {}  # 已解析出的变量类型，赋值时清空
+        self._node_types = {}  # id(节点) -> (节点, 类型)，赋值时清空
 
     def _resolve_variable_type(self, var_name, visited=None):
         """递归查找变量真实类型，防止类型链断裂，递归表达式所有子节点"""
         if visited is None:
             visited = set()
+        # 只在没有访问上下文时使用缓存，此时结果与调用路径无关
+        if visited:
+            return self._resolve_variable_type_uncached(var_name, visited)
+        resolved = self._resolved_types.get(var_name)
+        if resolved is None:
+            resolved = self._resolve_variable_type_uncached(var_name, visited)
+            if resolved != "unknown":
+                self._resolved_types[var_name] = resolved
+        return resolved
+
+    def _resolve_variable_type_uncached(self, var_name, visited):
+        """_resolve_variable_type 的实际查找逻辑"""
         if var_name in visited:
             return "unknown"  # 防止循环引用
         visited.add(var_name)
@@ -800,10 +1181,7 @@ class ExprValidator(Transformer):
         value = assignment_tuple[1]
 
         # 检查变量名是否包含中文字符
-        import re
-
-        chinese_pattern = re.compile(r"[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]")
-        if chinese_pattern.search(var_name):
+        if not var_name.isascii() and _CHINESE_PATTERN.search(var_name):
             self.errors.append(f"变量名 '{var_name}' 包含中文字符，不支持")
 
         # 检查变量名是否与操作符冲突
@@ -818,6 +1196,9 @@ class ExprValidator(Transformer):
 
         # 递归推断右侧表达式类型
         inferred_type = self._get_node_type(value)
+        # 变量类型变化后之前的解析结果可能失效
+        self._resolved_types.clear()
+        self._node_types.clear()
         self.variables[var_name] = inferred_type
         self.variable_exprs[var_name] = value  # 记录表达式链
         if self.debug_mode:
@@ -843,10 +1224,7 @@ class ExprValidator(Transformer):
         name = str(args[0])
 
         # 检查操作符名是否包含中文字符
-        import re
-
-        chinese_pattern = re.compile(r"[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]")
-        if chinese_pattern.search(name):
+        if not name.isascii() and _CHINESE_PATTERN.search(name):
             self.errors.append(f"操作符名 '{name}' 包含中文字符，不支持")
 
         if len(args) == 1:
@@ -867,13 +1245,13 @@ class ExprValidator(Transformer):
             self.errors.append(error_msg)
             return {"type": "function_call", "name": name, "return_type": "unknown"}
 
-        op = valid_ops[name]
-        min_args = op["min_args"]
-        max_args = op.get("max_args")
+        op = op_specs[name]
+        min_args = op.min_args
+        max_args = op.max_args
 
-        pos_types = op.get("arg_types", [])
-        kw_types = op.get("kwarg_types", {})
-        var_args_type = op.get("var_args_type")  # 可变参数类型
+        pos_types = op.arg_types
+        kw_types = op.kwarg_types
+        var_args_type = op.var_args_type  # 可变参数类型
 
         # 分别计算位置参数和命名参数
         pos_args = []
@@ -926,11 +1304,11 @@ class ExprValidator(Transformer):
         for node in kw_args:
             key = str(node.children[0])
             value_node = node.children[1]
-            expect_type = kw_types.get(key)
             # 检查参数名是否合法
-            if key not in kw_types:
+            if key not in op.kwarg_names:
                 self.errors.append(f"{name} 的参数 `{key}` 不是有效参数名")
                 continue
+            expect_type = kw_types[key]
             actual_type = self._get_node_type(value_node)
             if expect_type and not self._is_type_compatible(expect_type, actual_type):
                 self.errors.append(
@@ -938,7 +1316,7 @@ class ExprValidator(Transformer):
                 )
 
         # 检查参数值选择
-        choices = op.get("choices", {})
+        choices = op.choices
         if choices and len(args) > 1:
             args_node = args[1]
             if hasattr(args_node, "children"):
@@ -961,21 +1339,18 @@ class ExprValidator(Transformer):
                             )
 
         # 返回函数调用的返回类型
-        return_type = op.get("return_type", "unknown")
+        return_type = op.return_type
         return {"type": "function_call", "name": name, "return_type": return_type}
 
     def field(self, token):
         field_name = str(token[0])
 
         # 检查字段名是否包含中文字符
-        import re
-
-        chinese_pattern = re.compile(r"[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]")
-        if chinese_pattern.search(field_name):
+        if not field_name.isascii() and _CHINESE_PATTERN.search(field_name):
             self.errors.append(f"字段名 '{field_name}' 包含中文字符，不支持")
 
         # 处理布尔字面量
-        if field_name in ["true", "false", "True", "False"]:
+        if field_name in _BOOL_LITERALS:
             return {"type": "boolean", "name": field_name, "return_type": "boolean"}
 
         # 首先检查是否是变量
@@ -997,83 +1372,64 @@ class ExprValidator(Transformer):
         """检查类型兼容性"""
         # 支持 expected 为数组（多类型兼容）
         if isinstance(expected, list):
-            return any(self._is_type_compatible(e, actual) for e in expected)
-
-        if expected == actual:
-            return True
-
-        # expr 兼容 field（表达式可以接受字段/变量）
-        if expected == "expr" and actual == "field":
-            return True
-
-        # field 只兼容 field（字段参数不能接受表达式）
-        if expected == "field" and actual == "field":
-            return True
-
-        # number 兼容 number
-        if expected == "number" and actual == "number":
-            return True
-
-        # string 兼容 string
-        if expected == "string" and actual == "string":
-            return True
-
-        # boolean 兼容 boolean
-        if expected == "boolean" and actual == "boolean":
-            return True
-
-        # boolean 兼容 expr（布尔表达式可以接受任何表达式）
-        if expected == "boolean" and actual in ["expr", "field", "number"]:
-            return True
+            return any(
+                e == actual or (e, actual) in _COMPATIBLE_TYPES for e in expected
+            )
 
-        return False
+        return expected == actual or (expected, actual) in _COMPATIBLE_TYPES
 
     def _get_node_type(self, node, visited=None):
-        from lark.lexer import Token
-
-        if visited is None:
-            visited = set()
+        """推断节点类型，顶层调用（无访问上下文）时按节点缓存结果"""
+        if visited is not None:
+            return self._get_node_type_uncached(node, visited)
+        # 缓存中保留节点引用，避免节点被回收后 id 被复用
+        cached = self._node_types.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        node_type = self._get_node_type_uncached(node, set())
+        self._node_types[id(node)] = (node, node_type)
+        return node_type
+
+    def _get_node_type_uncached(self, node, visited):
+        """_get_node_type 的实际推断逻辑"""
+        # 单子节点的透传规则直接向下展开，不再逐层递归
+        while (
+            isinstance(node, Tree) and node.data in _PASSTHROUGH_NODES and node.children
+        ):
+            node = node.children[0]
 
         if isinstance(node, Token):
-            if node.type == "SIGNED_NUMBER":
-                return "number"
-            if node.type == "ESCAPED_STRING":
-                return "string"
-            if node.type == "BOOLEAN":
-                return "boolean"
+            literal_type = _TOKEN_LITERAL_TYPES.get(node.type)
+            if literal_type is not None:
+                return literal_type
             if node.type == "CNAME":
                 val = str(node)
-                if val in ["true", "false", "True", "False"]:
+                if val in _BOOL_LITERALS:
                     return "boolean"
                 # 检查是否是变量
-                if hasattr(self, "variables") and val in self.variables:
+                if val in self.variables:
                     t = self.variables[val]
                     if t == "unknown":
                         # 递归查找真实类型
                         return self._resolve_variable_type(val, visited)
                     return t
                 # 检查是否是有效字段
-                if hasattr(self, "valid_field_names") and val in self.valid_field_names:
+                if val in self.valid_field_names:
                     return "field"
                 # 不是有效字段名，返回 unknown
                 return "unknown"
-        elif hasattr(node, "data"):
-            if node.data == "number":
-                return "number"
-            if node.data == "string":
-                return "string"
-            if node.data == "boolean":
-                return "boolean"
+        elif isinstance(node, Tree):
+            literal_type = _LITERAL_NODE_TYPES.get(node.data)
+            if literal_type is not None:
+                return literal_type
             if node.data == "field":
                 # field 规则下只有一个子节点，直接递归
                 child_type = self._get_node_type(node.children[0], visited)
                 # 如果子节点是布尔字面量，直接返回boolean
-                if isinstance(node.children[0], Token) and str(node.children[0]) in [
-                    "true",
-                    "false",
-                    "True",
-                    "False",
-                ]:
+                if (
+                    isinstance(node.children[0], Token)
+                    and str(node.children[0]) in _BOOL_LITERALS
+                ):
                     return "boolean"
                 if child_type == "field":
                     return "field"
@@ -1082,30 +1438,19 @@ class ExprValidator(Transformer):
                 return child_type
             if node.data == "function":
                 # 函数调用，返回其返回类型
-                if hasattr(node, "return_type"):
-                    return node.return_type
+                return_type = getattr(node, "return_type", None)
+                if return_type is not None:
+                    return return_type
                 if (
                     node.children
-                    and hasattr(node.children[0], "type")
+                    and isinstance(node.children[0], Token)
                     and node.children[0].type == "CNAME"
                 ):
                     func_name = str(node.children[0])
                     if func_name in valid_ops:
                         return valid_ops[func_name].get("return_type", "unknown")
                 return "unknown"
-            # 处理嵌套的表达式节点
-            if node.data in [
-                "expr",
-                "logic_or",
-                "logic_and",
-                "logic_not",
-                "comparison",
-                "unary_expr",
-                "atom",
-            ]:
-                if node.children:
-                    return self._get_node_type(node.children[0], visited)
-            elif node.data in ["add_expr", "mul_expr"]:
+            if node.data in _ARITHMETIC_NODES:
                 # 算术运算的类型推断
                 if len(node.children) >= 3:  # 左操作数 操作符 右操作数
                     left_type = self._get_node_type(node.children[0], visited)
@@ -1126,26 +1471,49 @@ class ExprValidator(Transformer):
                     return "expr"
                 elif node.children:
                     return self._get_node_type(node.children[0], visited)
-            elif node.data in ["greater", "greater_eq", "less", "less_eq", "eq", "neq"]:
+            elif node.data in _COMPARISON_NODES:
                 # 比较操作符返回boolean类型
                 return "boolean"
         elif isinstance(node, dict):
             # 处理函数调用返回的字典
-            if node.get("type") == "function_call":
+            kind = node.get("type")
+            if kind == "function_call":
                 return node.get("return_type", "unknown")
-            elif node.get("type") == "field":
+            elif kind == "field":
                 return "field"
-            elif node.get("type") == "variable":
+            elif kind == "variable":
                 # 递归查找变量真实类型
                 var_name = node.get("name")
                 return self._resolve_variable_type(var_name, visited)
-            elif node.get("type") == "boolean":
+            elif kind == "boolean":
                 return "boolean"
             else:
                 return node.get("return_type", "unknown")
         return "unknown"
 
 
+# ====== 验证结果缓存 ======
+# 字符和语法验证只依赖表达式本身，可在所有验证器实例间共享结果
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_character_errors(expr: str) -> Tuple[ValidationError, ...]:
+    """字符验证及整体标识符验证的错误，按原有顺序合并"""
+    validator = CharacterValidator()
+    char_errors = list(validator.validate(expr))
+    # _validate_identifiers 返回的列表同时包含之前的字符错误
+    id_errors = validator._validate_identifiers(expr, 0)
+    return tuple(char_errors + id_errors)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_parse(expr: str) -> Tuple[Optional[Tree], Tuple[ValidationError, ...]]:
+    """语法验证的结果：(语法树，解析失败时为 None, 错误)"""
+    validator = SyntaxValidator()
+    errors = tuple(validator.validate(expr))
+    return validator.tree, errors
+
+
 # ====== 4. 表达式验证器类 ======
 class ExpressionValidator:
     """
@@ -1154,14 +1522,27 @@ class ExpressionValidator:
     初始化时设置地区、延迟和股票池参数，后续验证时只需传入表达式
     """
 
-    def __init__(self, region: str, delay: int, universe: str):
+    # 组合键 -> 生成的字段检查函数，同一组合的实例共享
+    _name_checkers: Dict[str, Callable[[str], bool]] = {}
+
+    def __init__(
+        self,
+        region: Union[str, ValidatorKey],
+        delay: Optional[int] = None,
+        universe: Optional[str] = None,
+    ):
         """
         初始化验证器
 
-        :param region: 地区 (如 USA, CHN, EUR)
+        :param region: 地区 (如 USA, CHN, EUR)，也可直接传入 ValidatorKey
         :param delay: 延迟天数 (如 0, 1)
         :param universe: 股票池 (如 TOP500, TOP1000, TOP3000)
         """
+        if isinstance(region, ValidatorKey):
+            self._key = region
+        else:
+            self._key = ValidatorKey(region, delay, universe)
+        region, delay, universe = self._key
         self.region = region
         self.delay = delay
         self.universe = universe
@@ -1172,65 +1553,79 @@ class ExpressionValidator:
 
         # 验证组合参数是否有效
         if self.combination_key not in data_fields_dict:
-            # 获取可用的组合参数
-            available_keys = list(data_fields_dict.keys())
-            available_keys.sort()
-
-            # 构建简洁的错误信息
-            error_msg = f"无效参数组合: {self.combination_key}\n"
-            error_msg += "可用组合:\n"
-
-            # 按地区分组显示，更简洁
-            regions = {}
-            for key in available_keys:
-                parts = key.split("_")
-                if len(parts) >= 3:
-                    r, d, u = parts[0], parts[1], "_".join(parts[2:])
-                    if r not in regions:
-                        regions[r] = []
-                    regions[r].append(f"{d}/{u}")
-
-            for region_name, configs in regions.items():
-                error_msg += f"  {region_name}: {', '.join(configs)}\n"
-
-            raise ValueError(error_msg)
+            # 可用组合列表只在错误信息被使用时生成
+            raise InvalidCombinationError(self.combination_key, tuple(data_fields_dict))
 
         # 获取对应的数据字段
-        self.valid_field_names = set(data_fields_dict[self.combination_key])
-
-        # 初始化各个验证器
+        self.valid_field_names = data_fields_dict[self.combination_key]
+        # 针对当前组合生成专用的字段检查函数，每个组合只生成一次
+        check_name = self._name_checkers.get(self.combination_key)
+        if check_name is None:
+            check_name = compile_name_checker(self.valid_field_names)
+            self._name_checkers[self.combination_key] = check_name
+        self._check_name = check_name
+
+        # 子验证器在验证过程中保存状态，同一实例的验证需串行执行
+        self._lock = threading.Lock()
+
+        # 初始化各个验证器。默认的字符和语法验证器直接使用按表达式全局缓存的结果，
+        # 替换为其他实例（如自定义语法文件的 SyntaxValidator）时改为调用该实例
         self.character_validator = CharacterValidator()
         self.syntax_validator = SyntaxValidator()
         self.business_validator = BusinessRuleValidator()
         self.operator_validator = OperatorValidator(valid_ops)
-        self.data_field_validator = DataFieldValidator(self.valid_field_names)
+        self.data_field_validator = DataFieldValidator(
+            self.valid_field_names, self._check_name
+        )
 
-    def validate(self, expr: str):
+    def validate(self, expr: str, fast_fail: bool = False):
         """
         验证表达式是否合法
 
         :param expr: 表达式字符串
+        :param fast_fail: 字符或语法验证失败时跳过后续验证
         :return: (是否通过验证: bool, 错误列表: List[str])
         """
+        all_errors = self.collect_errors(expr, fast_fail)
+
+        # 如果有错误，返回错误信息
+        if all_errors:
+            return False, [format_error(error) for error in all_errors]
+
+        return True, []
+
+    def collect_errors(
+        self, expr: str, fast_fail: bool = False
+    ) -> List[ValidationError]:
+        """
+        收集表达式的结构化错误，不做字符串格式化
+
+        :param expr: 表达式字符串
+        :param fast_fail: 字符或语法验证失败时跳过后续验证，只返回这些错误
+        :return: 错误列表，为空表示验证通过
+        """
+        with self._lock:
+            return self._collect_errors(expr, fast_fail)
+
+    def _collect_errors(self, expr: str, fast_fail: bool) -> List[ValidationError]:
+        """collect_errors 的实际验证流程"""
         all_errors = []
 
         # 1. 注释过滤 - 先过滤注释，再验证代码
         filtered_expr = filter_comments(expr)
 
-        # 2. 字符验证
-        char_errors = self.character_validator.validate(filtered_expr)
-        all_errors.extend(char_errors)
-
-        # 3. 标识符验证
-        id_errors = self.character_validator._validate_identifiers(filtered_expr, 0)
-        all_errors.extend(id_errors)
+        # 2-3. 字符验证和标识符验证
+        all_errors.extend(self._character_errors(filtered_expr))
 
         # 4. 语法验证
-        syntax_errors = self.syntax_validator.validate(filtered_expr)
+        tree, syntax_errors = self._parse(filtered_expr)
         all_errors.extend(syntax_errors)
+        # 后续验证多为连带错误，快速失败模式下直接返回
+        if fast_fail and all_errors:
+            return all_errors
 
-        # 5. 操作符验证
-        op_errors = self.operator_validator.validate(filtered_expr)
+        # 5. 操作符验证（解析成功时直接使用语法树）
+        op_errors = self.operator_validator.validate(filtered_expr, tree)
         all_errors.extend(op_errors)
 
         # 6. 数据字段验证
@@ -1241,19 +1636,24 @@ class ExpressionValidator:
         business_errors = self.business_validator.validate(filtered_expr)
         all_errors.extend(business_errors)
 
-        # 如果有错误，返回错误信息
-        if all_errors:
-            error_messages = []
-            for error in all_errors:
-                error_msg = error.message
-                if error.line and error.column:
-                    error_msg = f"第{error.line}行第{error.column}列: {error.message}"
-                if error.suggestion:
-                    error_msg += f" ({error.suggestion})"
-                error_messages.append(error_msg)
-            return False, error_messages
-
-        return True, []
+        return all_errors
+
+    def _character_errors(self, expr: str) -> Tuple[ValidationError, ...]:
+        """字符及标识符验证，默认验证器使用全局缓存的结果"""
+        validator = self.character_validator
+        if type(validator) is CharacterValidator:
+            return _cached_character_errors(expr)
+        char_errors = list(validator.validate(expr))
+        # _validate_identifiers 返回的列表同时包含之前的字符错误
+        return tuple(char_errors + validator._validate_identifiers(expr, 0))
+
+    def _parse(self, expr: str) -> Tuple[Optional[Tree], Tuple[ValidationError, ...]]:
+        """语法验证，使用默认语法的验证器时返回全局缓存的结果"""
+        validator = self.syntax_validator
+        if type(validator) is SyntaxValidator and validator.parser is parser:
+            return _cached_parse(expr)
+        errors = tuple(validator.validate(expr))
+        return validator.tree, errors
 
     # 删除不再使用的方法
 
@@ -1261,9 +1661,9 @@ class ExpressionValidator:
         """
         获取当前配置下的有效字段列表
 
-        :return: 有效字段集合
+        :return: 有效字段集合（不可变的 frozenset，与验证器共享）
         """
-        return self.valid_field_names.copy()
+        return self.valid_field_names
 
     def get_config(self):
         """
@@ -1272,15 +1672,34 @@ class ExpressionValidator:
         :return: 配置字典
         """
         return {
-            "region": self.region,
-            "delay": self.delay,
-            "universe": self.universe,
+            **self._key._asdict(),
             "combination_key": self.combination_key,
             "valid_fields_count": len(self.valid_field_names),
         }
 
 
 # ====== 5. 向后兼容的函数 ======
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_validator(key: ValidatorKey) -> ExpressionValidator:
+    """按 ValidatorKey 复用验证器实例，验证过程由实例内部的锁串行化"""
+    return ExpressionValidator(key)
+
+
+def _get_validator(
+    region: Union[str, ValidatorKey],
+    delay: Optional[int] = None,
+    universe: Optional[str] = None,
+) -> ExpressionValidator:
+    """获取复用的验证器实例，参数先统一为 ValidatorKey 作为缓存键"""
+    if isinstance(region, ValidatorKey):
+        key = region
+    else:
+        key = ValidatorKey(region, delay, universe)
+    return _cached_validator(key)
+
+
 def validate_expression(expr: str, region: str, delay: int, universe: str):
     """
     验证表达式是否合法（向后兼容函数）
@@ -1291,5 +1710,4 @@ def validate_expression(expr: str, region: str, delay: int, universe: str):
     :param universe: 股票池 (如 TOP500, TOP1000, TOP3000)
     :return: (是否通过验证: bool, 错误列表: List[str])
     """
-    validator = ExpressionValidator(region, delay, universe)
-    return validator.validate(expr)
+    return _get_validator(region, delay, universe).validate(expr)